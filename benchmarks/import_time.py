@@ -0,0 +1,69 @@
+"""Measure how long `import pyautoguide` takes in a fresh interpreter.
+
+Usage: python benchmarks/import_time.py [--runs 10] [--max-seconds 0.5]
+
+Fails when the median import time is over budget, or when importing the
+package loads a dependency that should only load on first use.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# dependencies only the features that need them may import
+LAZY_MODULES = (
+    "cv2",
+    "networkx",
+    "pydot",
+    "graphviz",
+    "transitions",
+    "statemachine",
+    "pyautogui",
+    "pyscreeze",
+    "rapidocr",
+    "mss",
+)
+
+PROBE = f"""
+import json, sys, time
+start = time.perf_counter()
+import pyautoguide
+seconds = time.perf_counter() - start
+loaded = [name for name in {LAZY_MODULES!r} if name in sys.modules]
+print(json.dumps({{"seconds": seconds, "loaded": loaded}}))
+"""
+
+
+def measure() -> dict:
+    """Import the package once in a new interpreter."""
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE], check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(out.splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--max-seconds", type=float, default=0.5)
+    args = parser.parse_args()
+
+    results = [measure() for _ in range(args.runs)]
+    median = statistics.median(result["seconds"] for result in results)
+    loaded = sorted({name for result in results for name in result["loaded"]})
+    print(f"import pyautoguide: median {median * 1000:.1f} ms over {args.runs} runs")
+
+    failed = False
+    if loaded:
+        print(f"FAIL: eagerly imported {', '.join(loaded)}")
+        failed = True
+    if median > args.max_seconds:
+        print(f"FAIL: over the {args.max_seconds * 1000:.0f} ms budget")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""Synthetic screens for the benchmarks, rendered with PIL.
+
+Every screen has a toolbar of buttons, paragraphs of text, a table and
+scattered colour blobs, laid out proportionally so 1080p and 4K screens hold
+the same widgets at different sizes. Rendering is seeded, so a screen is
+identical from run to run.
+"""
+
+import random
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from PIL import Image, ImageDraw, ImageFont
+
+RESOLUTIONS = {"1080p": (1920, 1080), "4k": (3840, 2160)}
+
+# colour of the blobs `Box.find_color` looks for
+BLOB_COLOR = (220, 40, 60)
+BUTTON_LABELS = ("File", "Edit", "View", "Search", "Run", "Settings", "Help")
+# labels rendered as references but never drawn on screen
+MISSING_LABELS = ("Archive", "Deploy")
+WORDS = (
+    "alpha bravo charlie delta echo foxtrot golf hotel india juliet kilo lima".split()
+)
+
+
+@dataclass
+class Screen:
+    """A rendered screen and where its widgets are."""
+
+    name: str
+    image: Image.Image
+    # button label to (left, top, width, height)
+    buttons: dict[str, tuple[int, int, int, int]] = field(default_factory=dict)
+    # every table cell, row by row
+    cells: list[tuple[int, int, int, int]] = field(default_factory=list)
+    # text drawn in the table cells, in the same order
+    cell_texts: list[str] = field(default_factory=list)
+    # references cropped from the screen or rendered alike, by name
+    references: dict[str, Image.Image] = field(default_factory=dict)
+
+    def save_references(self, directory: Path) -> dict[str, Path]:
+        """Write the references as PNG files and return their paths."""
+        directory.mkdir(parents=True, exist_ok=True)
+        paths = {}
+        for name, img in self.references.items():
+            paths[name] = directory / f"{self.name}-{name}.png"
+            img.save(paths[name])
+        return paths
+
+
+def _button(label: str, font: ImageFont.ImageFont, scale: float) -> Image.Image:
+    pad = round(12 * scale)
+    left, top, right, bottom = font.getbbox(label)
+    img = Image.new("RGB", (right - left + 2 * pad, bottom - top + 2 * pad), "white")
+    draw = ImageDraw.Draw(img)
+    draw.rounded_rectangle(
+        (0, 0, img.width - 1, img.height - 1),
+        radius=round(6 * scale),
+        fill=(235, 238, 244),
+        outline=(90, 100, 120),
+        width=max(1, round(scale)),
+    )
+    draw.text((pad - left, pad - top), label, fill=(20, 20, 30), font=font)
+    return img
+
+
+def render(name: str, *, seed: int = 0) -> Screen:
+    """Render the screen of one of the `RESOLUTIONS`."""
+    width, height = RESOLUTIONS[name]
+    scale = width / 1920
+    rng = random.Random(seed)
+    img = Image.new("RGB", (width, height), (250, 250, 252))
+    draw = ImageDraw.Draw(img)
+    font = ImageFont.load_default(size=round(18 * scale))
+    screen = Screen(name, img)
+
+    # toolbar
+    draw.rectangle((0, 0, width, round(56 * scale)), fill=(244, 245, 248))
+    x = round(16 * scale)
+    for label in BUTTON_LABELS:
+        button = _button(label, font, scale)
+        top = round((56 * scale - button.height) / 2)
+        img.paste(button, (x, top))
+        screen.buttons[label] = (x, top, button.width, button.height)
+        screen.references[f"button-{label}"] = button
+        x += button.width + round(10 * scale)
+    for label in MISSING_LABELS:
+        screen.references[f"button-{label}"] = _button(label, font, scale)
+
+    # paragraphs on the left
+    y = round(90 * scale)
+    line_height = round(28 * scale)
+    for _ in range(18):
+        line = " ".join(rng.choice(WORDS) for _ in range(8))
+        draw.text((round(24 * scale), y), line, fill=(40, 40, 48), font=font)
+        y += line_height
+
+    # table on the right
+    rows, columns = 24, 6
+    cell_w, cell_h = round(150 * scale), round(30 * scale)
+    left, top = round(width * 0.5), round(90 * scale)
+    for row in range(rows):
+        for column in range(columns):
+            cell = (left + column * cell_w, top + row * cell_h, cell_w, cell_h)
+            draw.rectangle(
+                (cell[0], cell[1], cell[0] + cell_w, cell[1] + cell_h),
+                outline=(200, 204, 212),
+                fill=(255, 255, 255) if row % 2 else (246, 247, 250),
+            )
+            txt = f"{rng.choice(WORDS)} {rng.randint(0, 999)}"
+            draw.text(
+                (cell[0] + round(8 * scale), cell[1] + round(6 * scale)),
+                txt,
+                fill=(30, 30, 40),
+                font=font,
+            )
+            screen.cells.append(cell)
+            screen.cell_texts.append(txt)
+
+    # colour blobs, some in the target colour and many near misses around them
+    blob_top = round(height * 0.62)
+    for i in range(160):
+        r = rng.randint(round(3 * scale), round(14 * scale))
+        cx = rng.randint(r, round(width * 0.48) - r)
+        cy = rng.randint(blob_top + r, height - r)
+        color = (
+            BLOB_COLOR
+            if i % 4 == 0
+            else tuple(min(255, c + rng.randint(8, 40)) for c in BLOB_COLOR)
+        )
+        draw.ellipse((cx - r, cy - r, cx + r, cy + r), fill=color)
+    return screen
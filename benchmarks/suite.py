@@ -0,0 +1,308 @@
+"""Time the vision and planning hot paths on synthetic screens.
+
+Usage: python benchmarks/suite.py [--repeat 10] [--only NAME] [--update]
+
+Screens are rendered by `screens.py` at 1080p and 4K and served through a
+`VirtualScreen`, so no display is needed. The best time of every case, the
+least disturbed by other load on the machine, is compared with
+`baseline.json`; a case slower than its baseline by more than the threshold
+fails the run. Cases over the threshold are measured again before they
+fail, so a burst of load during one measurement is not a regression.
+With OCR installed, text reused from the previous frame after a word is
+erased is also checked against a full recognition of the edited screen.
+`--update` records the current times as the new baseline, which is only
+meaningful on the machine the baseline is for.
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+import numpy as np
+from PIL import ImageDraw
+from screens import BLOB_COLOR, MISSING_LABELS, RESOLUTIONS, Screen, render
+
+from pyautoguide import (
+    Box,
+    ImageElement,
+    TextElement,
+    VirtualScreen,
+    WorkFlow,
+    set_backend,
+    text,
+)
+from pyautoguide.actions import locate_on_screen
+from pyautoguide.box_array import BoxArray
+
+BASELINE = Path(__file__).with_name("baseline.json")
+# slowdown over the baseline best time that counts as a regression
+DEFAULT_THRESHOLD = 1.5
+# times a case over the threshold is measured again before it fails
+CONFIRM_ROUNDS = 2
+# seconds a case is run for at least, fast cases are repeated until then
+MIN_SECONDS = 1.0
+# side of the tiles `relative_to` filters, one box per tile of the screen
+TILE = 24
+# states of the synthetic workflow, laid out as a grid of navigations
+PLAN_GRID = 12
+# routes planned per timed call, planning one takes well under a millisecond
+PLAN_ROUTES = 100
+
+type Case = Callable[[], object]
+
+
+def _has_ocr() -> bool:
+    try:
+        import onnxruntime  # noqa: F401
+        import rapidocr  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def screen_cases(screen: Screen, refs: dict[str, Path]) -> dict[str, Case]:
+    """Cases that search one screen."""
+    width, height = screen.image.size
+    button = str(refs["button-Settings"])
+    variants = [str(refs[f"button-{label}"]) for label in MISSING_LABELS]
+    tiles = BoxArray(
+        Box(left=x, top=y, width=TILE, height=TILE)
+        for y in range(0, height, TILE)
+        for x in range(0, width, TILE)
+    )
+    middle = Box(left=width // 2, top=height // 2, width=TILE, height=TILE)
+    # a strip just above the colour blobs
+    anchor = Box(left=0, top=round(height * 0.6), width=round(width * 0.48), height=4)
+
+    cases: dict[str, Case] = {
+        "locate_on_screen": lambda: locate_on_screen(button, confidence=0.99),
+        "image_element_variants": lambda: (
+            ImageElement([*variants, button], confidence=0.99).locate()
+        ),
+        "find_color": lambda: anchor.find_color(BLOB_COLOR, "bottom"),
+        "relative_to": lambda: tiles.relative_to("bottom-right", of=middle),
+    }
+    if _has_ocr():
+        from pyautoguide.ocr import OCR
+
+        label = TextElement(screen.cell_texts[-1], region="x:(1-2)/2 y:1/1")
+
+        def locate_text() -> object:
+            # recognize every time rather than measure the result cache
+            OCR.img_cache.clear()
+            return label.locate()
+
+        cases["text_element"] = locate_text
+    return cases
+
+
+def check_text_reuse(screen: Screen) -> str | None:
+    """Compare the text reused after erasing a word with a full recognition.
+
+    One table cell is erased, so only its area is recognized again and the
+    rest of the text comes from the previous frame. Returns a description of
+    the difference, or None when they agree.
+    """
+    from pyautoguide.frame import Frame, dirty_tiles
+    from pyautoguide.ocr import OCR, text_index
+
+    OCR.img_cache.clear()
+    before = Frame(np.asarray(screen.image))
+    text_index(before)
+
+    edited = screen.image.copy()
+    left, top, width, height = screen.cells[len(screen.cells) // 2]
+    ImageDraw.Draw(edited).rectangle(
+        (left + 1, top + 1, left + width - 1, top + height - 1), fill="white"
+    )
+    pixels = np.asarray(edited)
+    after = Frame(pixels, previous=before, dirty=dirty_tiles(before.pixels, pixels))
+    reused = sorted(txt for txt, _ in text_index(after).detections)
+
+    OCR.img_cache.clear()
+    full = sorted(txt for txt, _ in text_index(Frame(pixels)).detections)
+    if reused == full:
+        return None
+    missing = sorted(set(full) - set(reused))
+    extra = sorted(set(reused) - set(full))
+    return f"reused text misses {missing} and has extra {extra}"
+
+
+def check(only: str | None) -> list[str]:
+    """Run the correctness checks whose name contains `only`, return failures."""
+    if not _has_ocr():
+        return []
+    failures = []
+    for resolution in RESOLUTIONS:
+        key = f"text_reuse[{resolution}]"
+        if only and only not in key:
+            continue
+        failure = check_text_reuse(render(resolution))
+        print(f"{key:<36} {'ok' if failure is None else 'FAIL'}")
+        if failure is not None:
+            failures.append(f"{key}: {failure}")
+    return failures
+
+
+def _navigation(name: str) -> Callable[[], None]:
+    def navigate() -> None:
+        pass
+
+    navigate.__name__ = name
+    return navigate
+
+
+def plan_case() -> Case:
+    """Plan routes across a grid of states, each after a recorded transition."""
+    workflow = WorkFlow("benchmark", stats_path=None)
+    states = [
+        [text(f"state {row}-{col}") for col in range(PLAN_GRID)]
+        for row in range(PLAN_GRID)
+    ]
+    for row in range(PLAN_GRID):
+        for col in range(PLAN_GRID):
+            if col + 1 < PLAN_GRID:
+                workflow.navigation(states[row][col], states[row][col + 1])(
+                    _navigation(f"right_{row}_{col}")
+                )
+            if row + 1 < PLAN_GRID:
+                workflow.navigation(states[row][col], states[row + 1][col])(
+                    _navigation(f"down_{row}_{col}")
+                )
+    graph = workflow.graph
+    sources = [states[0][0].name, states[1][0].name]
+    target = states[-1][-1].name
+    rng = np.random.default_rng(0)
+    # distinct measured costs, so a single route is the cheapest
+    for event in workflow.navigations:
+        graph.record(event, float(rng.uniform(0.2, 2.0)))
+
+    def plan() -> object:
+        for _ in range(PLAN_ROUTES):
+            # a measured transition changes the costs, as during `expect`
+            graph.record("event_right_0_0", float(rng.uniform(0.2, 2.0)))
+            route = graph.route(sources, target)
+        return route
+
+    return plan
+
+
+def measure(case: Case, repeat: int) -> dict[str, float]:
+    """Run a case once to warm up, then `repeat` times and for `MIN_SECONDS`.
+
+    Short cases get many runs, so their best time is rarely one slowed down
+    by other load on the machine.
+    """
+    case()
+    times = []
+    end = time.perf_counter() + MIN_SECONDS
+    while len(times) < repeat or time.perf_counter() < end:
+        start = time.perf_counter()
+        case()
+        times.append(time.perf_counter() - start)
+    return {"median": statistics.median(times), "min": min(times), "runs": len(times)}
+
+
+def run(
+    repeat: int, only: str | None, keys: set[str] | None = None
+) -> dict[str, dict[str, float]]:
+    """Measure the cases whose name contains `only`, or those in `keys`."""
+
+    def wanted(key: str) -> bool:
+        return key in keys if keys is not None else not only or only in key
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for resolution in RESOLUTIONS:
+            screen = render(resolution)
+            refs = screen.save_references(Path(tmp))
+            set_backend(VirtualScreen(screen.image))
+            for name, case in screen_cases(screen, refs).items():
+                key = f"{name}[{resolution}]"
+                if not wanted(key):
+                    continue
+                results[key] = measure(case, repeat)
+                print(f"{key:<36} {results[key]['min'] * 1000:9.2f} ms")
+    if wanted("plan"):
+        results["plan"] = measure(plan_case(), repeat)
+        print(f"{'plan':<36} {results['plan']['min'] * 1000:9.2f} ms")
+    return results
+
+
+def compare(
+    results: dict[str, dict[str, float]], baseline: dict, threshold: float
+) -> dict[str, str]:
+    """Cases slower than their baseline by more than the threshold, described."""
+    regressions = {}
+    for key, result in results.items():
+        reference = baseline.get("results", {}).get(key)
+        if reference is None:
+            continue
+        ratio = result["min"] / reference["min"]
+        if ratio > threshold:
+            regressions[key] = (
+                f"{key}: {result['min'] * 1000:.2f} ms, "
+                f"{ratio:.2f}x the baseline {reference['min'] * 1000:.2f} ms"
+            )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--only", help="run the cases whose name contains this")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--output", type=Path, help="also write the results here")
+    parser.add_argument("--update", action="store_true", help="rewrite the baseline")
+    args = parser.parse_args()
+
+    failures = check(args.only)
+    results = run(args.repeat, args.only)
+    report = {
+        "machine": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+        },
+        "threshold": args.threshold,
+        "results": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if args.update:
+        if args.only and args.baseline.exists():
+            # keep the baseline of the cases not run
+            previous = json.loads(args.baseline.read_text())["results"]
+            report["results"] = previous | results
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}, run with --update to record one")
+        return 1 if failures else 0
+
+    baseline = json.loads(args.baseline.read_text())
+    regressions = compare(results, baseline, args.threshold)
+    for _ in range(CONFIRM_ROUNDS):
+        if not regressions:
+            break
+        print(f"Measuring {', '.join(regressions)} again")
+        for key, result in run(args.repeat, None, set(regressions)).items():
+            results[key]["min"] = min(results[key]["min"], result["min"])
+        regressions = compare(results, baseline, args.threshold)
+    for regression in regressions.values():
+        print(f"FAIL: {regression}")
+    return 1 if regressions or failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,34 @@
-from .references import ImageElement, ReferenceImageDir, TextElement, image, text
-from .scene import Scene
-from .session import Session
+from typing import TYPE_CHECKING
+
+from .aio import all_of, first_of
+from .capture import (
+    CaptureBackend,
+    PyAutoGUIBackend,
+    VirtualScreen,
+    X11Backend,
+    get_backend,
+    set_backend,
+)
+from .display_pool import DisplayPool, JobResult
+from .frame import Frame, snapshot
+from .references import (
+    ImageElement,
+    ReferenceImageDir,
+    TextElement,
+    image,
+    locate_many,
+    text,
+)
 from .shapes import Box, BoxSpec
+from .telemetry import Recorder, Span, add_hook, remove_hook
+from .waiting import Waiter, WaitResult
+from .warmup import WarmupReport, warmup
 from .workflow import WorkFlow
 
+if TYPE_CHECKING:
+    from .scene import Scene
+    from .session import Session
+
 __all__ = [
     "Scene",
     "Session",
@@ -15,4 +40,38 @@ __all__ = [
     "ReferenceImageDir",
     "text",
     "image",
+    "locate_many",
+    "Frame",
+    "snapshot",
+    "CaptureBackend",
+    "PyAutoGUIBackend",
+    "X11Backend",
+    "VirtualScreen",
+    "get_backend",
+    "set_backend",
+    "DisplayPool",
+    "JobResult",
+    "first_of",
+    "all_of",
+    "Waiter",
+    "WaitResult",
+    "warmup",
+    "WarmupReport",
+    "Recorder",
+    "Span",
+    "add_hook",
+    "remove_hook",
 ]
+
+
+def __getattr__(name: str):
+    # scenes and sessions need python-statemachine, imported on first use
+    if name == "Scene":
+        from .scene import Scene
+
+        return Scene
+    if name == "Session":
+        from .session import Session
+
+        return Session
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
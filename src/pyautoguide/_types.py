@@ -16,3 +16,6 @@ type Direction = (
     ]
     | int
 )
+type Color = tuple[int, int, int]
+# lower and upper HSV bounds, on OpenCV's scale where hue runs from 0 to 179
+type HSVRange = tuple[Color, Color]
@@ -1,17 +1,23 @@
+from __future__ import annotations
+
 import logging
-import os
 import time
-from typing import Callable
+from collections.abc import Sequence
+from typing import TYPE_CHECKING, Callable
 from warnings import deprecated
 
 import numpy as np
-import pyautogui as gui
 from PIL import Image
 
 from ._types import Direction, MouseButton
 from .box_array import BoxArray
 from .constants import LOCATE_AND_CLICK_DELAY, POINTER_SPEED
+from .frame import screenshot
 from .shapes import Box, BoxSpec, Point
+from .telemetry import span
+
+if TYPE_CHECKING:
+    from .templates import Template
 
 logger = logging.getLogger(__name__)
 
@@ -29,7 +35,8 @@ def locate_and_click(
     towards: Direction | None = None,
     index: int = 0,
 ):
-    time.sleep(LOCATE_AND_CLICK_DELAY)
+    with span("delay"):
+        time.sleep(LOCATE_AND_CLICK_DELAY)
     found_region = locate_on_screen(
         reference,
         region=region,
@@ -46,7 +53,8 @@ def locate_and_click(
     else:
         target_box = found_region[index]
     move_and_click(target=target_box, clicks=clicks, button=button)
-    time.sleep(LOCATE_AND_CLICK_DELAY)
+    with span("delay"):
+        time.sleep(LOCATE_AND_CLICK_DELAY)
 
 
 def move_and_click(
@@ -57,6 +65,8 @@ def move_and_click(
     The offset is always added to the calculated target point.
     For example, for 'bottom', offset=(0, 5) means 5 pixels below the bottom edge.
     """
+    import pyautogui as gui
+
     if isinstance(target, Box):
         target = target.center
     elif isinstance(target, Point):
@@ -67,49 +77,66 @@ def move_and_click(
         raise TypeError(f"Unsupported type for target_box: {type(target)}")
 
     current = gui.position()
-    duration = np.linalg.norm(np.array(target) - np.array(current)) / POINTER_SPEED
-    gui.moveTo(*target, float(duration), gui.easeInOutQuad)  # type: ignore
-    gui.click(clicks=clicks, button=button)
+    distance = np.linalg.norm(np.array(target) - np.array(current))
+    with span("move", target=target, distance=float(distance)):
+        gui.moveTo(*target, float(distance / POINTER_SPEED), gui.easeInOutQuad)  # type: ignore
+    with span("click", target=target, clicks=clicks, button=button):
+        gui.click(clicks=clicks, button=button)
 
 
 def locate_on_screen(
-    reference: Image.Image | str,
+    reference: Image.Image | Template | str,
     region: BoxSpec | None = None,
     confidence: float = 0.999,
     grayscale: bool = True,
     limit: int = 1,
     locator: Callable[[Image.Image, Image.Image], BoxArray] | None = None,
+    first: bool = False,
+    pyramid: int = 0,
+    scales: Sequence[float] = (1.0,),
 ) -> BoxArray | None:
-    """Locate a region on the screen."""
+    """Locate a region on the screen.
+
+    Image paths are decoded once and served from the in-memory template store.
+    Without a custom `locator`, the built-in OpenCV matcher returns the best
+    `limit` matches with their scores; `first` stops at the first match above
+    `confidence` when only presence matters. `pyramid` and `scales` enable
+    coarse-to-fine and multi-scale search, see `locate_template`.
+    """
+    from .matching import locate_template
+    from .templates import Template, templates
+
     if isinstance(reference, str):
-        if not os.path.exists(reference):
-            raise FileNotFoundError(f"Image file {reference} does not exist.")
-        reference = Image.open(reference)
-    if locator is None:
-        try:
-            locations = list(
-                gui.locateAllOnScreen(
-                    reference,
-                    region=Box.from_spec(region).to_tuple() if region else None,
-                    grayscale=grayscale,
-                    confidence=confidence,
-                )
+        reference = templates.get(reference)
+    region_box = Box.from_spec(region) if region else None
+    logger.info(
+        f"Searching in region: {region_box.to_tuple() if region_box else None}.\nGiven region: {region}"
+    )
+    name = reference.path if isinstance(reference, Template) else None
+    with span("match", template=name, region=region_box) as current:
+        if locator is None:
+            if not isinstance(reference, Template):
+                reference = Template.from_image(reference)
+            detections = locate_template(
+                reference,
+                region_box,
+                grayscale=grayscale,
+                confidence=confidence,
+                limit=limit,
+                first=first,
+                pyramid=pyramid,
+                scales=scales,
             )
-            return BoxArray((Box.from_tuple(loc) for loc in locations[:limit]))
-        except gui.ImageNotFoundException:
-            return None
-        except FileNotFoundError:
-            return None
-    else:
-        screenshot = gui.screenshot(
-            region=Box.from_spec(region).to_tuple() if region else None
-        )
-        logger.info(
-            f"Searching in region: {Box.from_spec(region).to_tuple() if region else None}.\nGiven region: {region}"
-        )
-        detections = locator(reference, screenshot)
-        logger.info("total detections: %d", len(detections))
-        if len(detections) == 0:
-            return None
         else:
-            return BoxArray((det.resolve(region) for det in detections[:limit]))
+            if isinstance(reference, Template):
+                reference = reference.image()
+            detections = locator(reference, screenshot(region=region_box))
+        if current is not None:
+            current.attrs["found"] = len(detections)
+    logger.info("total detections: %d", len(detections))
+    if len(detections) == 0:
+        return None
+    detections = detections[:limit]
+    if not isinstance(detections, BoxArray):
+        detections = BoxArray(detections)
+    return detections.resolve(region_box)
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from functools import partial
+from typing import TYPE_CHECKING, Literal
+
+from .waiting import Waiter, WaitResult, WaitTarget
+
+if TYPE_CHECKING:
+    from .box_array import BoxArray
+    from .references import ReferenceElement
+    from .shapes import BoxSpec
+
+logger = logging.getLogger(__name__)
+
+_executor: ThreadPoolExecutor | None = None
+
+
+def _blocking_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(thread_name_prefix="pyautoguide-async")
+    return _executor
+
+
+async def run_blocking[T](func: Callable[..., T], *args, **kwargs) -> T:
+    """Run a blocking call in the shared thread pool, without blocking the loop.
+
+    The call sees the caller's context, such as an active `snapshot` frame.
+    """
+    loop = asyncio.get_running_loop()
+    call = partial(copy_context().run, func, *args, **kwargs)
+    return await loop.run_in_executor(_blocking_executor(), call)
+
+
+async def alocate(
+    element: ReferenceElement,
+    region: BoxSpec | None = None,
+    n: int = 1,
+    error: Literal["raise", "coerce"] = "raise",
+) -> BoxArray | None:
+    """Locate an element, matching and OCR running in a worker thread."""
+    return await run_blocking(element.locate, region, n, error)
+
+
+async def await_for(
+    targets: WaitTarget | Sequence[WaitTarget],
+    *,
+    raise_if: WaitTarget | None = None,
+    timeout: float | None = 60,
+    interval: float = 1,
+    keep_busy: bool = False,
+) -> WaitResult:
+    """Wait until any of the targets is on screen, see `Waiter`.
+
+    Only the screen checks run in a worker thread; the pauses between them
+    are asyncio sleeps, so many waits can share one event loop cheaply and
+    are cancelled at the next pause.
+    """
+    if not isinstance(targets, Sequence):
+        targets = [targets]
+    waiter = Waiter(
+        targets,
+        raise_if=raise_if,
+        timeout=timeout,
+        interval=interval,
+        keep_busy=keep_busy,
+    )
+    waiter.start()
+    while (result := await run_blocking(waiter.poll)) is None:
+        delay = waiter.pause()
+        if keep_busy:
+            await run_blocking(waiter.move_mouse)
+        await asyncio.sleep(delay)
+    return result
+
+
+async def first_of[T](*aws: Awaitable[T]) -> tuple[int, T]:
+    """Wait for the first awaitable to finish and cancel the others.
+
+    Returns the position of the winner among the arguments and its result,
+    or raises its exception.
+    """
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+    index = next(i for i, task in enumerate(tasks) if task in done)
+    return index, tasks[index].result()
+
+
+async def all_of[T](*aws: Awaitable[T]) -> list[T]:
+    """Wait for every awaitable, cancelling the others if one fails."""
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        return list(await asyncio.gather(*tasks))
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -1,68 +1,143 @@
 from __future__ import annotations
 
 import warnings
-from collections.abc import Iterable, Sequence
-from typing import TYPE_CHECKING, Callable
+from collections.abc import Iterable, Iterator, Sequence
+from typing import TYPE_CHECKING, Callable, Literal
+
+import numpy as np
 
 from ._types import Direction
 from .shapes import Box, BoxSpec
-from .utils import line_intersects_box
+from .utils import direction_to_vector
 
 if TYPE_CHECKING:
     from pyautoguide.references import ReferenceElement
 
+# direction components smaller than this are treated as zero in ray tests
+RAY_EPSILON = 1e-9
+# slack in pixels, so rays grazing a corner hit it despite rounding
+RAY_TOLERANCE = 1e-6
+
 
 class BoxArray(Sequence[Box]):
-    """An immutable sequence of Box objects that proxies methods to its contents."""
+    """An immutable sequence of Box objects that proxies methods to its contents.
+
+    Boxes are stored as rows of an (N, 4) integer array of left, top, width
+    and height, and `Box` objects are only built when elements are accessed.
+    Arrays produced by a matcher also carry one score per box.
+    """
+
+    def __init__(
+        self, boxes: Iterable[Box] | None = None, scores: Iterable[float] | None = None
+    ) -> None:
+        rows = [(box.left, box.top, box.width, box.height) for box in (boxes or ())]
+        self._ltwh = _frozen(np.array(rows, dtype=np.int64).reshape(-1, 4))
+        self._scores = (
+            _frozen(np.array(list(scores), dtype=np.float64))
+            if scores is not None
+            else None
+        )
+        if self._scores is not None and len(self._scores) != len(self._ltwh):
+            raise ValueError("There must be exactly one score per box.")
+
+    @classmethod
+    def from_array(cls, ltwh: np.ndarray, scores: np.ndarray | None = None) -> BoxArray:
+        """Wrap an (N, 4) array of left, top, width and height, without copying."""
+        array = cls.__new__(cls)
+        array._ltwh = _frozen(np.asarray(ltwh, dtype=np.int64).reshape(-1, 4))
+        array._scores = (
+            _frozen(np.asarray(scores, dtype=np.float64))
+            if scores is not None
+            else None
+        )
+        if array._scores is not None and len(array._scores) != len(array._ltwh):
+            raise ValueError("There must be exactly one score per box.")
+        return array
+
+    def _take(self, index: slice | np.ndarray) -> BoxArray:
+        scores = self._scores[index] if self._scores is not None else None
+        return BoxArray.from_array(self._ltwh[index], scores)
 
-    def __init__(self, boxes: Iterable[Box] | None = None) -> None:
-        self._boxes = tuple(boxes) if boxes is not None else ()
+    @property
+    def array(self) -> np.ndarray:
+        """Read-only (N, 4) array of left, top, width and height."""
+        return self._ltwh
+
+    @property
+    def scores(self) -> tuple[float, ...] | None:
+        """Match scores of the boxes, if they came from a matcher."""
+        return tuple(self._scores.tolist()) if self._scores is not None else None
+
+    @property
+    def centers(self) -> np.ndarray:
+        """(N, 2) array of the box centers, rounded like `Box.center`."""
+        return self._ltwh[:, :2] + self._ltwh[:, 2:] // 2
 
     def __getitem__(self, index: int | slice) -> Box | BoxArray:
         """Returns a Box or a new BoxArray from a slice."""
         if isinstance(index, slice):
-            return BoxArray(self._boxes[index])
-        return self._boxes[index]
+            return self._take(index)
+        left, top, width, height = self._ltwh[index].tolist()
+        return Box(left=left, top=top, width=width, height=height)
 
     def __len__(self) -> int:
         """Returns the number of boxes in the array."""
-        return len(self._boxes)
+        return len(self._ltwh)
+
+    def __iter__(self) -> Iterator[Box]:
+        for left, top, width, height in self._ltwh.tolist():
+            yield Box(left=left, top=top, width=width, height=height)
+
+    def __repr__(self) -> str:
+        return f"BoxArray({list(self)!r})"
 
     def __add__(self, boxes: object) -> BoxArray:
         """Extends the BoxArray with additional Box objects."""
         if not isinstance(boxes, Iterable):
             raise TypeError(f"Expected an iterable of Box objects, got {type(boxes)}")
-        new_boxes = tuple(boxes)
-        if not all(isinstance(box, Box) for box in new_boxes):
-            raise TypeError("All items must be instances of Box.")
-        return BoxArray(new_boxes + self._boxes)
+        if not isinstance(boxes, BoxArray):
+            new_boxes = tuple(boxes)
+            if not all(isinstance(box, Box) for box in new_boxes):
+                raise TypeError("All items must be instances of Box.")
+            boxes = BoxArray(new_boxes)
+        scores = None
+        new_scores = boxes._scores if len(boxes) else np.empty(0)
+        old_scores = self._scores if len(self) else np.empty(0)
+        if new_scores is not None and old_scores is not None:
+            scores = np.concatenate([new_scores, old_scores])
+        return BoxArray.from_array(np.concatenate([boxes._ltwh, self._ltwh]), scores)
 
     def first(self) -> Box:
         """Returns the first Box in the array."""
-        if not self._boxes:
+        if not len(self):
             raise IndexError("BoxArray is empty.")
-        return self._boxes[0]
+        return self[0]
 
     def last(self) -> Box:
         """Returns the last Box in the array."""
-        if not self._boxes:
+        if not len(self):
             raise IndexError("BoxArray is empty.")
-        return self._boxes[-1]
+        return self[-1]
 
     def select(self, *, i: int) -> Box:
         """Returns the Box at the specified index."""
-        return self._boxes[i]
+        return self[i]
 
     def pick(self, region: BoxSpec) -> BoxArray:
         """Returns a new BoxArray with boxes those have center inside the region."""
-
-        new_boxes = [box for box in self._boxes if box.center in Box.from_spec(region)]
-        return BoxArray(new_boxes)
+        region = Box.from_spec(region)
+        x, y = self.centers.T
+        inside = (
+            (region.left <= x)
+            & (x <= region.left + region.width)
+            & (region.top <= y)
+            & (y <= region.top + region.height)
+        )
+        return self._take(inside)
 
     def filter_by(self, condition: Callable[[Box], bool]) -> BoxArray:
         """Returns a new BoxArray with boxes that satisfy the given condition."""
-        new_boxes = [box for box in self._boxes if condition(box)]
-        return BoxArray(new_boxes)
+        return self._take(np.array([condition(box) for box in self], dtype=bool))
 
     def relative_to(
         self, direction: Direction, *, of: BoxSpec | ReferenceElement
@@ -70,37 +145,133 @@ class BoxArray(Sequence[Box]):
         """Returns a new BoxArray with boxes relative to the specified direction and origin."""
         if isinstance(of, str):
             of = Box.from_spec(of)
-        elif isinstance(of, ReferenceElement):
+        elif not isinstance(of, Box):
             of = of.locate().first()
-        return BoxArray(
-            (
-                box
-                for box in self._boxes
-                if line_intersects_box(box, direction, of.center)
+        return self._take(self._hit_by_ray(of.center.to_tuple(), direction))
+
+    def _hit_by_ray(self, origin: tuple[int, int], direction: Direction) -> np.ndarray:
+        """Mask of the boxes a ray from `origin` towards `direction` touches.
+
+        Slab test: on each axis the ray is inside the box between two
+        distances along it, and it hits the box when these intervals overlap
+        at a distance of zero or more.
+        """
+        d = direction_to_vector(direction)
+        lower = self._ltwh[:, :2].astype(np.float64)
+        upper = lower + self._ltwh[:, 2:]
+        origin_ = np.array(origin, dtype=np.float64)
+        near = np.full(len(self), -np.inf)
+        far = np.full(len(self), np.inf)
+        for axis in range(2):
+            if abs(d[axis]) < RAY_EPSILON:
+                # parallel to this axis, the origin must lie within the slab
+                outside = (origin_[axis] < lower[:, axis]) | (
+                    origin_[axis] > upper[:, axis]
+                )
+                far[outside] = -np.inf
+                continue
+            t1 = (lower[:, axis] - origin_[axis]) / d[axis]
+            t2 = (upper[:, axis] - origin_[axis]) / d[axis]
+            near = np.maximum(near, np.minimum(t1, t2))
+            far = np.minimum(far, np.maximum(t1, t2))
+        return (far + RAY_TOLERANCE >= near) & (far + RAY_TOLERANCE >= 0)
+
+    def sort_by(
+        self,
+        key: Literal["left", "top", "width", "height", "area", "score"],
+        *,
+        reverse: bool = False,
+    ) -> BoxArray:
+        """Returns a new BoxArray ordered by a column, the area or the score."""
+        if key == "score":
+            if self._scores is None:
+                raise ValueError("BoxArray has no scores to sort by.")
+            values = self._scores
+        elif key == "area":
+            values = self._ltwh[:, 2] * self._ltwh[:, 3]
+        else:
+            values = self._ltwh[:, ("left", "top", "width", "height").index(key)]
+        order = np.argsort(-values if reverse else values, kind="stable")
+        return self._take(order)
+
+    def sort_along(self, direction: Direction, *, of: BoxSpec) -> BoxArray:
+        """Returns a new BoxArray ordered by how far the centers lie along `direction`."""
+        origin = Box.from_spec(of).center.to_tuple()
+        distance = (self.centers - origin) @ direction_to_vector(direction)
+        return self._take(np.argsort(distance, kind="stable"))
+
+    def overlapping(self, region: BoxSpec) -> BoxArray:
+        """Returns a new BoxArray with the boxes that share any area with the region."""
+        region = Box.from_spec(region)
+        left, top, width, height = self._ltwh.T
+        overlaps = (
+            (left < region.left + region.width)
+            & (region.left < left + width)
+            & (top < region.top + region.height)
+            & (region.top < top + height)
+        )
+        return self._take(overlaps)
+
+    def intersect(self, other: BoxSpec) -> BoxArray:
+        """Returns the intersections with a region, dropping boxes outside it."""
+        other = Box.from_spec(other)
+        lower = np.maximum(self._ltwh[:, :2], (other.left, other.top))
+        upper = np.minimum(
+            self._ltwh[:, :2] + self._ltwh[:, 2:],
+            (other.left + other.width, other.top + other.height),
+        )
+        keep = (lower < upper).all(axis=1)
+        if not keep.all():
+            warnings.warn(
+                f"{int((~keep).sum())} box(es) do not intersect {other}", stacklevel=2
             )
+        scores = self._scores[keep] if self._scores is not None else None
+        return BoxArray.from_array(np.hstack([lower, upper - lower])[keep], scores)
+
+    def resolve(self, base: BoxSpec | None = None) -> BoxArray:
+        """Returns the boxes moved from coordinates relative to `base` to the screen."""
+        if base is None:
+            return self
+        base = Box.from_spec(base)
+        return BoxArray.from_array(
+            self._ltwh + (base.left, base.top, 0, 0), self._scores
+        )
+
+    def offset(self, direction: Direction, shift: int = 0) -> BoxArray:
+        """Returns the boxes moved `shift` pixels in the direction.
+
+        Coordinates are truncated like `Box.offset`, so both agree.
+        """
+        moved = self._ltwh[:, :2] + direction_to_vector(direction) * shift
+        return BoxArray.from_array(
+            np.hstack([moved.astype(np.int64), self._ltwh[:, 2:]]), self._scores
         )
 
     def __getattr__(self, name: str):
         """Dynamically proxies method calls to the specified Box."""
         # Check if the attribute is a callable method on the Box class
-        if not hasattr(Box, name) or not callable(getattr(Box, name)):
+        if (
+            name.startswith("__")
+            or not hasattr(Box, name)
+            or not callable(getattr(Box, name))
+        ):
             raise AttributeError(
                 f"'{type(self).__name__}' object has no attribute '{name}'"
             )
 
         def method_proxy(*args, **kwargs):
             """Proxy function that calls the method on the selected Box."""
-            if not self._boxes:
+            if not len(self):
                 raise ValueError(f"BoxArray is empty, cannot call method {name}.")
 
             new_boxes = []
-            for box in self._boxes:
+            for box in self:
                 try:
                     return_value = getattr(box, name)(*args, **kwargs)
                     if isinstance(return_value, Box):
                         new_boxes.append(return_value)
                     elif isinstance(return_value, BoxArray):
-                        new_boxes.extend(return_value._boxes)
+                        new_boxes.extend(return_value)
                     else:
                         raise TypeError(
                             f"Method {name} returned unexpected type: {type(return_value)}"
@@ -112,3 +283,10 @@ class BoxArray(Sequence[Box]):
             return BoxArray(new_boxes)
 
         return method_proxy
+
+
+def _frozen(array: np.ndarray) -> np.ndarray:
+    """A read-only view, so arrays sharing rows cannot change each other."""
+    view = array.view()
+    view.flags.writeable = False
+    return view
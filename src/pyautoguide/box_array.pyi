@@ -1,22 +1,40 @@
 from __future__ import annotations
 
-from collections.abc import Iterable, Sequence
+from collections.abc import Iterable, Iterator, Sequence
 from pathlib import Path
-from typing import Callable, overload
+from typing import TYPE_CHECKING, Callable, Literal, overload
 
-from ._types import Direction, MouseButton
+import numpy as np
+
+from ._types import Color, Direction, HSVRange, MouseButton
 from .shapes import Box, BoxSpec
 
+if TYPE_CHECKING:
+    from .references import ReferenceElement
+
 class BoxArray(Sequence[Box]):
     """An immutable sequence of Box objects that proxies methods to its contents."""
 
-    def __init__(self, boxes: Iterable[Box] | None = None) -> None: ...
+    def __init__(
+        self, boxes: Iterable[Box] | None = None, scores: Iterable[float] | None = None
+    ) -> None: ...
+    @classmethod
+    def from_array(
+        cls, ltwh: np.ndarray, scores: np.ndarray | None = None
+    ) -> BoxArray: ...
+    @property
+    def array(self) -> np.ndarray: ...
+    @property
+    def scores(self) -> tuple[float, ...] | None: ...
+    @property
+    def centers(self) -> np.ndarray: ...
     @overload
     def __getitem__(self, index: int) -> Box: ...
     @overload
     def __getitem__(self, index: slice) -> BoxArray: ...
     def __getitem__(self, index: int | slice) -> Box | BoxArray: ...
     def __len__(self) -> int: ...
+    def __iter__(self) -> Iterator[Box]: ...
     def __add__(self, boxes: object) -> BoxArray: ...
 
     # `BoxArray` methods
@@ -25,17 +43,32 @@ class BoxArray(Sequence[Box]):
     def select(self, *, i: int) -> Box: ...
     def pick(self, region: BoxSpec) -> BoxArray: ...
     def filter_by(self, condition: Callable[[Box], bool]) -> BoxArray: ...
-    def relative_to(self, direction: Direction, *, of: BoxSpec) -> BoxArray: ...
+    def relative_to(
+        self, direction: Direction, *, of: BoxSpec | ReferenceElement
+    ) -> BoxArray: ...
+    def sort_by(
+        self,
+        key: Literal["left", "top", "width", "height", "area", "score"],
+        *,
+        reverse: bool = False,
+    ) -> BoxArray: ...
+    def sort_along(self, direction: Direction, *, of: BoxSpec) -> BoxArray: ...
+    def overlapping(self, region: BoxSpec) -> BoxArray: ...
+    def intersect(self, other: BoxSpec) -> BoxArray: ...
+    def resolve(self, base: BoxSpec | None = None) -> BoxArray: ...
+    def offset(self, direction: Direction, shift: int = 0) -> BoxArray: ...
 
     # `Box` proxies
-    def resolve(self, base: BoxSpec | None = None) -> BoxArray: ...
     def click(self, clicks: int = 1, button: MouseButton = "left") -> BoxArray: ...
-    def offset(self, direction: Direction, shift: int = 0) -> BoxArray: ...
     def find_color(
         self,
-        color: tuple[int, int, int],
+        color: Color | Sequence[Color] | None,
         towards: Direction,
         *,
         region: BoxSpec | None = None,
+        tolerance: int | None = None,
+        hsv: HSVRange | Sequence[HSVRange] | None = None,
+        min_area: int = 1,
+        max_area: int | None = None,
     ) -> BoxArray: ...
     def log_screenshot(self, filename: str | Path) -> BoxArray: ...
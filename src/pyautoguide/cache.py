@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class CacheStats:
+    """Counters of a cache since it was created or cleared."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    disk_hits: int = 0
+
+
+class DiskTier:
+    """Persistent JSON store backing an `LRUCache` across processes and restarts.
+
+    Entries are evicted least recently used first, by modification time,
+    once the directory grows past `max_bytes`.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        max_bytes: int,
+        encode: Callable[[Any], Any] = lambda value: value,
+        decode: Callable[[Any], Any] = lambda value: value,
+    ):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.encode = encode
+        self.decode = decode
+        self._lock = threading.Lock()
+        self.bytes = sum(size for _, size, _ in self._entries())
+
+    def _file(self, key: str) -> Path:
+        return self.path / key[:2] / f"{key}.json"
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        entries = []
+        for file in self.path.glob("*/*.json"):
+            try:
+                stat = file.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, file))
+        return entries
+
+    def get(self, key: str) -> Any | None:
+        file = self._file(key)
+        try:
+            with open(file) as f:
+                value = self.decode(json.load(f))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable cache entry {key}: {e}")
+            return None
+        # mark the entry as recently used
+        try:
+            os.utime(file)
+        except OSError:
+            pass
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        file = self._file(key)
+        file.parent.mkdir(exist_ok=True)
+        # write then rename, so concurrent readers never see a partial entry
+        fd, tmp = tempfile.mkstemp(dir=file.parent, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(self.encode(value), f)
+        size = os.path.getsize(tmp)
+        try:
+            size -= file.stat().st_size
+        except FileNotFoundError:
+            pass
+        os.replace(tmp, file)
+        with self._lock:
+            self.bytes += size
+            if self.bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        # other processes may share the directory, so recount it from disk
+        entries = sorted(self._entries())
+        self.bytes = sum(size for _, size, _ in entries)
+        for _, size, file in entries:
+            if self.bytes <= self.max_bytes:
+                break
+            try:
+                file.unlink()
+            except FileNotFoundError:
+                pass
+            self.bytes -= size
+
+
+class LRUCache[V]:
+    """Thread-safe least-recently-used cache bounded by an approximate byte size.
+
+    Entries evicted from memory stay available from the optional disk tier.
+    """
+
+    def __init__(
+        self, max_bytes: int, sizeof: Callable[[V], int], disk: DiskTier | None = None
+    ):
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.disk = disk
+        self.bytes = 0
+        self.stats = CacheStats()
+        self._items: OrderedDict[str, tuple[V, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._items
+
+    def get(self, key: str) -> V | None:
+        """Return the cached value, or None on a miss."""
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                self._items.move_to_end(key)
+                self.stats.hits += 1
+                return item[0]
+        if self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.stats.disk_hits += 1
+                self._insert(key, value)
+                return value
+        self.stats.misses += 1
+        return None
+
+    def put(self, key: str, value: V) -> None:
+        """Cache a value, evicting the least recently used entries over budget."""
+        self._insert(key, value)
+        if self.disk is not None:
+            self.disk.put(key, value)
+
+    def _insert(self, key: str, value: V) -> None:
+        size = self.sizeof(value)
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._items[key] = (value, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes and len(self._items) > 1:
+                _, (_, evicted_size) = self._items.popitem(last=False)
+                self.bytes -= evicted_size
+                self.stats.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every in-memory entry and reset the counters."""
+        with self._lock:
+            self._items.clear()
+            self.bytes = 0
+            self.stats = CacheStats()
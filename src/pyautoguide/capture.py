@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import logging
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from .constants import CAPTURE_BACKEND
+from .shapes import Box
+
+logger = logging.getLogger(__name__)
+
+
+class CaptureBackend(ABC):
+    """Source of screen pixels.
+
+    Backends return RGB `uint8` arrays of shape (height, width, 3).
+    """
+
+    @abstractmethod
+    def grab(self, region: Box | None = None) -> np.ndarray:
+        """Capture the region, or the whole screen if no region is given."""
+        raise NotImplementedError("Subclasses must implement this method")
+
+    @abstractmethod
+    def size(self) -> tuple[int, int]:
+        """Width and height of the screen."""
+        raise NotImplementedError("Subclasses must implement this method")
+
+
+class PyAutoGUIBackend(CaptureBackend):
+    """Capture through `pyautogui.screenshot`."""
+
+    def grab(self, region: Box | None = None) -> np.ndarray:
+        import pyautogui as gui
+
+        img = gui.screenshot(region=region.to_tuple() if region else None)
+        return np.asarray(img.convert("RGB"))
+
+    def size(self) -> tuple[int, int]:
+        import pyautogui as gui
+
+        width, height = gui.size()
+        return int(width), int(height)
+
+
+class X11Backend(CaptureBackend):
+    """Capture an X11 display with mss, which uses XShm when the server supports it.
+
+    mss handles are not thread safe, so one is opened per thread.
+    """
+
+    def __init__(self, display: str | None = None):
+        try:
+            import mss
+        except ImportError:
+            raise ImportError(
+                "mss is not installed. Please install it using 'pip install pyautoguide[x11]'."
+            )
+        self._mss = mss
+        self.display = display
+        self._local = threading.local()
+
+    @property
+    def _sct(self):
+        sct = getattr(self._local, "sct", None)
+        if sct is None:
+            if self.display is None:
+                sct = self._mss.mss()
+            else:
+                sct = self._mss.mss(display=self.display)
+            self._local.sct = sct
+        return sct
+
+    def grab(self, region: Box | None = None) -> np.ndarray:
+        screen = self._sct.monitors[0]
+        if region is None:
+            monitor = screen
+        else:
+            monitor = {
+                "left": screen["left"] + region.left,
+                "top": screen["top"] + region.top,
+                "width": region.width,
+                "height": region.height,
+            }
+        bgra = np.asarray(self._sct.grab(monitor))
+        return np.ascontiguousarray(bgra[:, :, 2::-1])
+
+    def size(self) -> tuple[int, int]:
+        screen = self._sct.monitors[0]
+        return int(screen["width"]), int(screen["height"])
+
+
+type FrameSource = np.ndarray | Image.Image | str | Path
+
+
+class VirtualScreen(CaptureBackend):
+    """An in-memory screen that serves frames from arrays or image files.
+
+    Each `grab` moves on to the next queued frame and the screen stays on
+    the last one, unless `loop` is set.
+    """
+
+    def __init__(self, *frames: FrameSource, loop: bool = False):
+        self._frames = [self._load(frame) for frame in frames]
+        self._index = 0
+        self.loop = loop
+
+    @staticmethod
+    def _load(frame: FrameSource) -> np.ndarray:
+        if isinstance(frame, (str, Path)):
+            frame = Image.open(frame)
+        if isinstance(frame, Image.Image):
+            return np.asarray(frame.convert("RGB"))
+        if frame.ndim == 2:
+            return np.repeat(frame[:, :, None], 3, axis=2)
+        return np.ascontiguousarray(frame[:, :, :3])
+
+    @property
+    def current(self) -> np.ndarray:
+        """The frame currently on screen."""
+        if not self._frames:
+            raise ValueError("VirtualScreen has no frames.")
+        return self._frames[self._index]
+
+    def show(self, frame: FrameSource) -> None:
+        """Replace the queued frames with a single frame."""
+        self._frames = [self._load(frame)]
+        self._index = 0
+
+    def push(self, frame: FrameSource) -> None:
+        """Queue a frame to be served after the current ones."""
+        self._frames.append(self._load(frame))
+
+    def grab(self, region: Box | None = None) -> np.ndarray:
+        pixels = self.current
+        if self._index < len(self._frames) - 1:
+            self._index += 1
+        elif self.loop:
+            self._index = 0
+        if region is None:
+            return pixels
+        return pixels[
+            region.top : region.top + region.height,
+            region.left : region.left + region.width,
+        ]
+
+    def size(self) -> tuple[int, int]:
+        height, width = self.current.shape[:2]
+        return width, height
+
+
+_backend: CaptureBackend | None = None
+_screen_size: tuple[int, int] | None = None
+
+
+def _default_backend() -> CaptureBackend:
+    if CAPTURE_BACKEND == "pyautogui":
+        return PyAutoGUIBackend()
+    elif CAPTURE_BACKEND == "x11":
+        return X11Backend()
+    raise ValueError(f"Unknown capture backend: {CAPTURE_BACKEND}")
+
+
+def get_backend() -> CaptureBackend:
+    """Return the capture backend in use, creating the default one if needed."""
+    global _backend
+    if _backend is None:
+        _backend = _default_backend()
+        logger.info(f"Using capture backend: {type(_backend).__name__}")
+    return _backend
+
+
+def set_backend(backend: CaptureBackend) -> CaptureBackend | None:
+    """Route all screen capture through the given backend.
+
+    Returns the previously active backend, if any.
+    """
+    global _backend, _screen_size
+    previous, _backend = _backend, backend
+    _screen_size = None
+    return previous
+
+
+def grab_screen(region: Box | None = None) -> np.ndarray:
+    """Capture through the backend in use, keeping the cached screen size current.
+
+    A whole-screen capture gives the size away, and a region capture asks the
+    backend for it, so a resolution change is noticed by the next capture.
+    """
+    backend = get_backend()
+    pixels = backend.grab(region)
+    if region is None:
+        update_screen_size((pixels.shape[1], pixels.shape[0]))
+    else:
+        update_screen_size(backend.size())
+    return pixels
+
+
+def screen_size() -> tuple[int, int]:
+    """Width and height of the screen, cached until the resolution changes."""
+    global _screen_size
+    if _screen_size is None:
+        _screen_size = get_backend().size()
+    return _screen_size
+
+
+def update_screen_size(size: tuple[int, int]) -> None:
+    """Record the size of a fresh capture, dropping the cached one if it changed."""
+    global _screen_size
+    if size != _screen_size:
+        if _screen_size is not None:
+            logger.info(f"Screen resolution changed from {_screen_size} to {size}")
+        _screen_size = size
@@ -4,3 +4,26 @@ LOCATE_AND_CLICK_DELAY = float(os.getenv("PYAUTOGUIDE_LOCATE_AND_CLICK_DELAY", 0
 
 # pixels per second, used for calculating move duration
 POINTER_SPEED = int(os.getenv("PYAUTOGUIDE_POINTER_SPEED", 1000))
+
+# screen capture backend, one of "pyautogui" or "x11"
+CAPTURE_BACKEND = os.getenv("PYAUTOGUIDE_CAPTURE_BACKEND", "pyautogui")
+
+# threads used to match many templates against one frame
+MATCH_WORKERS = int(os.getenv("PYAUTOGUIDE_MATCH_WORKERS", os.cpu_count() or 1))
+
+# memory budget of the OCR result cache, in bytes
+OCR_CACHE_BYTES = int(os.getenv("PYAUTOGUIDE_OCR_CACHE_BYTES", 64 * 1024 * 1024))
+
+# directory of the persistent OCR result cache, disabled when unset
+OCR_CACHE_DIR = os.getenv("PYAUTOGUIDE_OCR_CACHE_DIR")
+
+# disk budget of the persistent OCR result cache, in bytes
+OCR_CACHE_DISK_BYTES = int(
+    os.getenv("PYAUTOGUIDE_OCR_CACHE_DISK_BYTES", 256 * 1024 * 1024)
+)
+
+# directory where workflows keep their measured transition costs, unset to disable
+NAVIGATION_STATS_DIR = os.getenv("PYAUTOGUIDE_NAVIGATION_STATS_DIR")
+
+# OCR worker processes, OCR runs in the calling thread when 0
+OCR_WORKERS = int(os.getenv("PYAUTOGUIDE_OCR_WORKERS", 0))
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import select
+import shutil
+import subprocess
+import time
+import traceback
+from collections.abc import Callable, Iterable
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any
+
+from .capture import X11Backend, set_backend
+
+logger = logging.getLogger(__name__)
+
+# seconds to wait for an Xvfb server to accept connections
+XVFB_START_TIMEOUT = 10.0
+
+# display of the current worker process, claimed by `_init_worker`
+_display: str | None = None
+
+
+def _init_worker(displays) -> None:
+    """Claim a display for this worker and route capture and input to it."""
+    global _display
+    _display = displays.get()
+    # pyautogui connects to $DISPLAY when it is first imported
+    os.environ["DISPLAY"] = _display
+    set_backend(X11Backend(_display))
+
+
+@dataclass(frozen=True, slots=True)
+class JobResult:
+    """Outcome of a job run on one display."""
+
+    display: str
+    value: Any = None
+    # formatted traceback when the job raised
+    error: str | None = None
+    # wall clock time the job started at, and seconds it ran for
+    started: float = 0.0
+    elapsed: float = 0.0
+    # CPU seconds used by the worker process during the job
+    cpu: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        """Whether the job finished without raising."""
+        return self.error is None
+
+
+def _run_job(job: Callable[..., Any], args: tuple, kwargs: dict) -> JobResult:
+    assert _display is not None, "Display should be claimed in _init_worker"
+    started = time.time()
+    start, cpu_start = time.perf_counter(), time.process_time()
+    value, error = None, None
+    try:
+        value = job(*args, **kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning(f"Job {job!r} failed on display {_display}")
+    return JobResult(
+        display=_display,
+        value=value,
+        error=error,
+        started=started,
+        elapsed=time.perf_counter() - start,
+        cpu=time.process_time() - cpu_start,
+    )
+
+
+def _start_xvfb(
+    size: tuple[int, int], depth: int, timeout: float
+) -> tuple[subprocess.Popen, str]:
+    """Start an Xvfb server on a free display number and wait until it is ready."""
+    xvfb = shutil.which("Xvfb")
+    if xvfb is None:
+        raise RuntimeError("Xvfb is not installed or not on PATH.")
+
+    # Xvfb picks a free display and writes its number once it accepts clients
+    read_fd, write_fd = os.pipe()
+    try:
+        proc = subprocess.Popen(
+            [
+                xvfb,
+                "-displayfd",
+                str(write_fd),
+                "-screen",
+                "0",
+                f"{size[0]}x{size[1]}x{depth}",
+                "-nolisten",
+                "tcp",
+            ],
+            pass_fds=(write_fd,),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+    finally:
+        os.close(write_fd)
+
+    try:
+        deadline = time.monotonic() + timeout
+        number = b""
+        while not number.endswith(b"\n"):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([read_fd], [], [], remaining)[0]:
+                proc.kill()
+                raise RuntimeError(f"Xvfb did not start within {timeout}s.")
+            chunk = os.read(read_fd, 16)
+            if not chunk:
+                raise RuntimeError(f"Xvfb exited with code {proc.wait()}.")
+            number += chunk
+    finally:
+        os.close(read_fd)
+    return proc, f":{int(number)}"
+
+
+class DisplayPool:
+    """Worker processes that each drive their own virtual X display.
+
+    Starts `n` Xvfb servers and one worker process per server. Every worker
+    captures the screen of its display and sends pointer and keyboard input
+    to it, so jobs running in different workers do not see each other.
+
+    Jobs are functions run in a worker, typically building a `WorkFlow` and
+    calling `expect`. They are sent to a fresh interpreter, so they and their
+    arguments must be picklable, such as module-level functions.
+    """
+
+    def __init__(
+        self,
+        n: int,
+        *,
+        size: tuple[int, int] = (1920, 1080),
+        depth: int = 24,
+        timeout: float = XVFB_START_TIMEOUT,
+    ):
+        self.size = size
+        self._servers: list[subprocess.Popen] = []
+        self.displays: list[str] = []
+        try:
+            for _ in range(n):
+                proc, display = _start_xvfb(size, depth, timeout)
+                self._servers.append(proc)
+                self.displays.append(display)
+            ctx = multiprocessing.get_context("spawn")
+            queue = ctx.Queue()
+            for display in self.displays:
+                queue.put(display)
+            self._pool = ProcessPoolExecutor(
+                max_workers=n,
+                mp_context=ctx,
+                initializer=_init_worker,
+                initargs=(queue,),
+            )
+        except BaseException:
+            self._stop_servers()
+            raise
+        logger.info(f"Started display pool on {', '.join(self.displays)}")
+
+    def __enter__(self) -> DisplayPool:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.displays)
+
+    def submit(self, job: Callable[..., Any], /, *args, **kwargs) -> Future[JobResult]:
+        """Run a job on the next free display."""
+        return self._pool.submit(_run_job, job, args, kwargs)
+
+    def run(self, job: Callable[..., Any], /, *args, **kwargs) -> JobResult:
+        """Run a job on the next free display and wait for its result."""
+        return self.submit(job, *args, **kwargs).result()
+
+    def map(
+        self, job: Callable[..., Any], *iterables: Iterable[Any]
+    ) -> list[JobResult]:
+        """Run a job for each set of arguments, as many at once as there are displays.
+
+        Results are in the order of the arguments; failed jobs carry their
+        traceback instead of raising.
+        """
+        futures = [self.submit(job, *args) for args in zip(*iterables)]
+        return [future.result() for future in futures]
+
+    def close(self) -> None:
+        """Stop the workers, then the X servers."""
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        self._stop_servers()
+
+    def _stop_servers(self) -> None:
+        for proc in self._servers:
+            proc.terminate()
+        for proc in self._servers:
+            try:
+                proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+        self._servers.clear()
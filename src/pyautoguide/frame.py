@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+from PIL import Image
+
+from .capture import grab_screen
+from .shapes import Box, BoxSpec
+from .telemetry import span
+
+logger = logging.getLogger(__name__)
+
+_active_frame: ContextVar[Frame | None] = ContextVar("active_frame", default=None)
+
+# side of the square tiles compared between consecutive frames, in pixels
+DIFF_TILE = 32
+
+
+@dataclass(slots=True, eq=False)
+class Frame:
+    """A single RGB capture of the whole screen."""
+
+    pixels: np.ndarray
+    timestamp: float = field(default_factory=time.monotonic)
+    cache: dict[Any, Any] = field(default_factory=dict, repr=False)
+    previous: Frame | None = field(default=None, repr=False)
+    dirty: np.ndarray | None = field(default=None, repr=False)
+
+    @classmethod
+    def grab(cls) -> Frame:
+        """Capture the whole screen."""
+        with span("capture"):
+            return cls(grab_screen())
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        """Height and width of the frame, in the order `Box.from_spec` expects."""
+        return self.pixels.shape[0], self.pixels.shape[1]
+
+    @property
+    def size(self) -> tuple[int, int]:
+        """Width and height of the frame."""
+        return self.pixels.shape[1], self.pixels.shape[0]
+
+    def gray(self) -> np.ndarray:
+        """The frame converted to grayscale, computed once."""
+        import cv2
+
+        gray = self.cache.get("gray")
+        if gray is None:
+            gray = self.cache["gray"] = cv2.cvtColor(self.pixels, cv2.COLOR_RGB2GRAY)
+        return gray
+
+    def pyramid(self, level: int, *, gray: bool = True) -> np.ndarray:
+        """The frame halved `level` times, each level computed once."""
+        import cv2
+
+        if level == 0:
+            return self.gray() if gray else self.pixels
+        key = ("pyramid", level, gray)
+        pixels = self.cache.get(key)
+        if pixels is None:
+            pixels = self.cache[key] = cv2.pyrDown(self.pyramid(level - 1, gray=gray))
+        return pixels
+
+    def crop(
+        self, region: BoxSpec | None = None, *, gray: bool = False, level: int = 0
+    ) -> np.ndarray:
+        """Return a view of the pixels inside the region, at a pyramid level."""
+        pixels = self.pyramid(level, gray=gray)
+        if region is None:
+            return pixels
+        box = Box.from_spec(region, shape=self.shape)
+        left, top = box.left >> level, box.top >> level
+        right = (box.left + box.width) >> level
+        bottom = (box.top + box.height) >> level
+        return pixels[top:bottom, left:right]
+
+    def image(self, region: BoxSpec | None = None) -> Image.Image:
+        """Return the pixels inside the region as a PIL image."""
+        return Image.fromarray(self.crop(region))
+
+    def _dirty_tiles(self, region: Box | None) -> np.ndarray:
+        assert self.dirty is not None
+        if region is None:
+            return self.dirty
+        return self.dirty[
+            region.top // DIFF_TILE : -(-(region.top + region.height) // DIFF_TILE),
+            region.left // DIFF_TILE : -(-(region.left + region.width) // DIFF_TILE),
+        ]
+
+    def is_clean(self, region: Box | None = None) -> bool:
+        """Whether no pixel in the region changed since the previous frame."""
+        if self.dirty is None:
+            return False
+        return not self._dirty_tiles(region).any()
+
+    def dirty_boxes(self, region: Box | None = None) -> list[Box]:
+        """Bounding boxes of the changed areas inside the region.
+
+        Touching changed tiles are grouped into one box, in screen coordinates
+        aligned to the diff tiles.
+        """
+        import cv2
+
+        if self.dirty is None:
+            return [region or Box(0, 0, *self.size)]
+        tiles = self._dirty_tiles(region).astype(np.uint8)
+        n, _, stats, _ = cv2.connectedComponentsWithStats(tiles, connectivity=8)
+        left = region.left // DIFF_TILE if region else 0
+        top = region.top // DIFF_TILE if region else 0
+        return [
+            Box(
+                left=(left + x) * DIFF_TILE,
+                top=(top + y) * DIFF_TILE,
+                width=w * DIFF_TILE,
+                height=h * DIFF_TILE,
+            )
+            for x, y, w, h, _ in stats[1:n].tolist()
+        ]
+
+    def reuse(self, key: Any, region: Box | None = None) -> Any | None:
+        """Result cached under `key`, taken from the previous frame if possible.
+
+        A previous result is reused only when nothing changed in the region it
+        was computed from.
+        """
+        value = self.cache.get(key)
+        if value is None and self.previous is not None and self.is_clean(region):
+            value = self.previous.cache.get(key)
+            if value is not None:
+                self.cache[key] = value
+        return value
+
+
+def dirty_tiles(before: np.ndarray, after: np.ndarray) -> np.ndarray:
+    """Boolean grid of the `DIFF_TILE` tiles that differ between two frames."""
+    height, width = after.shape[:2]
+    rows, columns = -(-height // DIFF_TILE), -(-width // DIFF_TILE)
+    if before is after:
+        return np.zeros((rows, columns), dtype=bool)
+    changed = (before != after).any(axis=2)
+    padded = np.zeros((rows * DIFF_TILE, columns * DIFF_TILE), dtype=bool)
+    padded[:height, :width] = changed
+    return padded.reshape(rows, DIFF_TILE, columns, DIFF_TILE).any(axis=(1, 3))
+
+
+class FrameTracker:
+    """Grabs frames and marks the tiles that changed since the previous grab.
+
+    Only the previous frame is kept, so work done on it can be reused for the
+    unchanged parts of the next one.
+    """
+
+    def __init__(self) -> None:
+        self.last: Frame | None = None
+        self._lock = threading.Lock()
+
+    def grab(self) -> Frame:
+        """Capture the whole screen and diff it against the previous capture."""
+        frame = Frame.grab()
+        with self._lock:
+            last, self.last = self.last, frame
+        if last is not None and last.pixels.shape == frame.pixels.shape:
+            frame.dirty = dirty_tiles(last.pixels, frame.pixels)
+            frame.previous = last
+            last.previous = None
+        return frame
+
+    def reset(self) -> None:
+        """Forget the previous frame."""
+        with self._lock:
+            self.last = None
+
+
+tracker = FrameTracker()
+
+
+def current_frame() -> Frame | None:
+    """Return the frame shared by the enclosing `snapshot` block, if any."""
+    return _active_frame.get()
+
+
+@contextmanager
+def snapshot(frame: Frame | None = None) -> Iterator[Frame]:
+    """Capture the screen once and share it with every locate call in the block.
+
+    Nested blocks reuse the outer frame unless a frame is given explicitly.
+    """
+    if frame is None:
+        frame = _active_frame.get() or tracker.grab()
+    token = _active_frame.set(frame)
+    try:
+        yield frame
+    finally:
+        _active_frame.reset(token)
+
+
+def grab(
+    region: BoxSpec | None = None, *, gray: bool = False, level: int = 0
+) -> np.ndarray:
+    """Pixels of the region, cropped from the active frame when there is one."""
+    import cv2
+
+    frame = _active_frame.get()
+    if frame is not None:
+        return frame.crop(region, gray=gray, level=level)
+    region_box = Box.from_spec(region) if region else None
+    with span("capture", region=region_box):
+        pixels = grab_screen(region_box)
+    if gray:
+        pixels = cv2.cvtColor(pixels, cv2.COLOR_RGB2GRAY)
+    for _ in range(level):
+        pixels = cv2.pyrDown(pixels)
+    return pixels
+
+
+def screenshot(region: BoxSpec | None = None) -> Image.Image:
+    """Screenshot of the region, cropped from the active frame when there is one."""
+    return Image.fromarray(grab(region))
@@ -0,0 +1,361 @@
+from __future__ import annotations
+
+import logging
+from collections.abc import Sequence
+
+import cv2
+import numpy as np
+
+from .box_array import BoxArray
+from .frame import Frame, current_frame, grab
+from .shapes import Box
+from .templates import Template
+
+logger = logging.getLogger(__name__)
+
+# candidates kept per requested match before non-maximum suppression
+CANDIDATES_PER_MATCH = 64
+# minimum height of the bands scanned when only presence matters
+PRESENCE_BAND_HEIGHT = 256
+# score slack given to candidates found on downscaled images
+COARSE_MARGIN = 0.2
+# coarse candidates verified at full resolution beyond the requested count
+EXTRA_COARSE_CANDIDATES = 8
+# pyramid levels stop before the template gets smaller than this
+MIN_PYRAMID_SIDE = 8
+
+
+def match_template(
+    haystack: np.ndarray,
+    needle: np.ndarray,
+    *,
+    confidence: float = 0.999,
+    limit: int = 1,
+    first: bool = False,
+) -> BoxArray:
+    """Find the best `limit` matches of the needle in the haystack.
+
+    Matches are scored with normalized cross-correlation and returned best
+    first, with their scores, in haystack coordinates. Overlapping matches
+    are suppressed. With `first`, the haystack is scanned in horizontal bands
+    and the first match above `confidence` is returned without scoring the
+    rest of the haystack.
+    """
+    height, width = needle.shape[:2]
+    if haystack.shape[0] < height or haystack.shape[1] < width:
+        return BoxArray()
+    if first:
+        return _first_match(haystack, needle, confidence)
+
+    scores = cv2.matchTemplate(haystack, needle, cv2.TM_CCOEFF_NORMED)
+    if limit == 1:
+        _, best, _, (x, y) = cv2.minMaxLoc(scores)
+        if best < confidence:
+            return BoxArray()
+        return BoxArray([Box(x, y, width, height)], scores=[best])
+    return _top_peaks(scores, (width, height), confidence, limit)
+
+
+def _first_match(haystack: np.ndarray, needle: np.ndarray, confidence: float):
+    height, width = needle.shape[:2]
+    band = max(PRESENCE_BAND_HEIGHT, 4 * height)
+    # consecutive bands overlap by `height - 1` rows so no placement is missed
+    for top in range(0, haystack.shape[0] - height + 1, band - height + 1):
+        strip = haystack[top : top + band]
+        scores = cv2.matchTemplate(strip, needle, cv2.TM_CCOEFF_NORMED)
+        _, best, _, (x, y) = cv2.minMaxLoc(scores)
+        if best >= confidence:
+            return BoxArray([Box(x, top + y, width, height)], scores=[best])
+    return BoxArray()
+
+
+def _top_peaks(
+    scores: np.ndarray, size: tuple[int, int], confidence: float, limit: int
+) -> BoxArray:
+    width, height = size
+    flat = scores.ravel()
+    candidates = np.flatnonzero(flat >= confidence)
+    pool = limit * CANDIDATES_PER_MATCH
+    if candidates.size > pool:
+        candidates = candidates[np.argpartition(flat[candidates], -pool)[-pool:]]
+    candidates = candidates[np.argsort(-flat[candidates], kind="stable")]
+
+    ys, xs = np.unravel_index(candidates, scores.shape)
+    boxes: list[Box] = []
+    found_scores: list[float] = []
+    for x, y, index in zip(xs.tolist(), ys.tolist(), candidates.tolist()):
+        if any(
+            abs(x - box.left) < width and abs(y - box.top) < height for box in boxes
+        ):
+            continue
+        boxes.append(Box(x, y, width, height))
+        found_scores.append(float(flat[index]))
+        if len(boxes) >= limit:
+            break
+    return BoxArray(boxes, scores=found_scores)
+
+
+def locate_template(
+    template: Template,
+    region: Box | None = None,
+    *,
+    grayscale: bool = True,
+    confidence: float = 0.999,
+    limit: int = 1,
+    first: bool = False,
+    pyramid: int = 0,
+    scales: Sequence[float] = (1.0,),
+) -> BoxArray:
+    """Match a template inside a region of the screen.
+
+    With `pyramid`, candidates are found on the frame and template halved that
+    many times and verified at full resolution in their neighbourhood. Each
+    entry of `scales` also tries the template resized by that factor. The
+    returned boxes are relative to the region.
+
+    Within a tracked frame, the result for an unchanged region is taken from
+    the previous frame instead of matching again. When the region changed
+    only in places, previous matches away from the changes are kept and only
+    the changed areas are searched again.
+    """
+    frame = current_frame()
+    if frame is None:
+        return _locate_template(
+            template, region, None, grayscale, confidence, limit, first, pyramid, scales
+        )
+    key = (
+        "match",
+        template,
+        region,
+        grayscale,
+        confidence,
+        limit,
+        first,
+        pyramid,
+        tuple(scales),
+    )
+    found = frame.reuse(key, region)
+    if found is None:
+        previous = frame.previous.cache.get(key) if frame.previous else None
+        if previous is not None:
+            found = _update_matches(
+                previous,
+                template,
+                region,
+                frame,
+                grayscale,
+                confidence,
+                limit,
+                first,
+                pyramid,
+                scales,
+            )
+        if found is None:
+            found = _locate_template(
+                template,
+                region,
+                frame,
+                grayscale,
+                confidence,
+                limit,
+                first,
+                pyramid,
+                scales,
+            )
+        frame.cache[key] = found
+    return found
+
+
+def _update_matches(
+    previous: BoxArray,
+    template: Template,
+    region: Box | None,
+    frame: Frame,
+    grayscale: bool,
+    confidence: float,
+    limit: int,
+    first: bool,
+    pyramid: int,
+    scales: Sequence[float],
+) -> BoxArray | None:
+    """Bring a previous frame's result up to date, or None if that needs a full match.
+
+    Any match that involves a changed pixel lies within a template size of a
+    changed area, so only those neighbourhoods need to be searched again.
+    Previous matches clear of the changed areas still hold, and one found
+    again in a neighbourhood is merged by the overlap suppression. The
+    previous result must still be trustworthy: a full result that lost a
+    match to the changes may have hidden the next best one.
+    """
+    origin = region or Box(0, 0, *frame.size)
+    width, height = template.size
+    reach_x, reach_y = int(width * max(scales)), int(height * max(scales))
+    dirty = frame.dirty_boxes(region)
+    windows = [
+        Box(
+            left=box.left - reach_x,
+            top=box.top - reach_y,
+            width=box.width + 2 * reach_x,
+            height=box.height + 2 * reach_y,
+        ).intersect(origin)
+        for box in dirty
+    ]
+    boxes: list[Box] = []
+    scores: list[float] = []
+    for box, score in zip(previous, previous.scores or ()):
+        if not any(box.resolve(origin).overlaps(changed) for changed in dirty):
+            boxes.append(box)
+            scores.append(score)
+    if len(boxes) < len(previous) and (first or len(previous) >= limit):
+        return None
+    if first and boxes:
+        return previous
+
+    for window in windows:
+        matches = _locate_template(
+            template,
+            window,
+            frame,
+            grayscale,
+            confidence,
+            limit,
+            first,
+            pyramid,
+            scales,
+        )
+        for box, score in zip(matches, matches.scores or ()):
+            boxes.append(
+                Box(
+                    left=box.left + window.left - origin.left,
+                    top=box.top + window.top - origin.top,
+                    width=box.width,
+                    height=box.height,
+                )
+            )
+            scores.append(score)
+        if first and boxes:
+            break
+    return _suppress(boxes, scores, limit)
+
+
+def _locate_template(
+    template: Template,
+    region: Box | None,
+    frame: Frame | None,
+    grayscale: bool,
+    confidence: float,
+    limit: int,
+    first: bool,
+    pyramid: int,
+    scales: Sequence[float],
+) -> BoxArray:
+    haystack = grab(region, gray=grayscale)
+    found = BoxArray()
+    for scale in scales:
+        needle = template.array(gray=grayscale, scale=scale)
+        level = _usable_level(needle, pyramid)
+        if level == 0:
+            matches = match_template(
+                haystack, needle, confidence=confidence, limit=limit, first=first
+            )
+        else:
+            if frame is not None:
+                coarse_haystack = frame.crop(region, gray=grayscale, level=level)
+            else:
+                coarse_haystack = haystack
+                for _ in range(level):
+                    coarse_haystack = cv2.pyrDown(coarse_haystack)
+            matches = pyramid_match(
+                haystack,
+                needle,
+                coarse_haystack,
+                template.array(gray=grayscale, scale=scale, level=level),
+                level,
+                confidence=confidence,
+                limit=limit,
+                first=first,
+            )
+        if first and matches:
+            return matches
+        found += matches
+    if len(scales) == 1:
+        return found
+    return _suppress(list(found), list(found.scores or ()), limit)
+
+
+def _usable_level(needle: np.ndarray, levels: int) -> int:
+    height, width = needle.shape[:2]
+    level = 0
+    while level < levels and min(height, width) >> (level + 1) >= MIN_PYRAMID_SIDE:
+        level += 1
+    return level
+
+
+def pyramid_match(
+    haystack: np.ndarray,
+    needle: np.ndarray,
+    coarse_haystack: np.ndarray,
+    coarse_needle: np.ndarray,
+    level: int,
+    *,
+    confidence: float = 0.999,
+    limit: int = 1,
+    first: bool = False,
+) -> BoxArray:
+    """Coarse-to-fine version of `match_template`.
+
+    The coarse images are the full-resolution ones halved `level` times.
+    """
+    height, width = needle.shape[:2]
+    coarse_height, coarse_width = coarse_needle.shape[:2]
+    if (
+        coarse_haystack.shape[0] < coarse_height
+        or coarse_haystack.shape[1] < coarse_width
+    ):
+        return BoxArray()
+    coarse_scores = cv2.matchTemplate(
+        coarse_haystack, coarse_needle, cv2.TM_CCOEFF_NORMED
+    )
+    candidates = _top_peaks(
+        coarse_scores,
+        (coarse_width, coarse_height),
+        confidence - COARSE_MARGIN,
+        limit + EXTRA_COARSE_CANDIDATES,
+    )
+
+    factor = 1 << level
+    pad = 2 * factor
+    boxes: list[Box] = []
+    scores: list[float] = []
+    for candidate in candidates:
+        left = max(candidate.left * factor - pad, 0)
+        top = max(candidate.top * factor - pad, 0)
+        window = haystack[
+            top : candidate.top * factor + height + pad,
+            left : candidate.left * factor + width + pad,
+        ]
+        if window.shape[0] < height or window.shape[1] < width:
+            continue
+        window_scores = cv2.matchTemplate(window, needle, cv2.TM_CCOEFF_NORMED)
+        _, best, _, (x, y) = cv2.minMaxLoc(window_scores)
+        if best >= confidence:
+            boxes.append(Box(left + x, top + y, width, height))
+            scores.append(best)
+            if first:
+                break
+    return _suppress(boxes, scores, limit)
+
+
+def _suppress(boxes: list[Box], scores: list[float], limit: int) -> BoxArray:
+    """Keep the best `limit` boxes, dropping any that overlap a better one."""
+    kept: list[Box] = []
+    kept_scores: list[float] = []
+    for index in sorted(range(len(boxes)), key=lambda i: -scores[i]):
+        box = boxes[index]
+        if any(box.overlaps(other) for other in kept):
+            continue
+        kept.append(box)
+        kept_scores.append(scores[index])
+        if len(kept) >= limit:
+            break
+    return BoxArray(kept, scores=kept_scores)
@@ -1,12 +1,19 @@
 import logging
 import os
-from hashlib import sha256
+import sys
+from concurrent.futures import Future
+from hashlib import blake2b
 from pathlib import Path
 
 import numpy as np
 from PIL import Image
 
+from .cache import DiskTier, LRUCache
+from .constants import OCR_CACHE_BYTES, OCR_CACHE_DIR, OCR_CACHE_DISK_BYTES, OCR_WORKERS
+from .frame import Frame
 from .shapes import Box
+from .telemetry import span
+from .text_index import TextIndex, text_matches
 
 logger = logging.getLogger(__name__)
 
@@ -22,9 +29,49 @@ default_ocr_config_path = Path(__file__).parent / "ocr_config.yaml"
 ocr_config_path = Path(os.getenv("PYAUTOGUIDE_OCR_CONFIG", default_ocr_config_path))
 logger.info(f"OCR config path: {ocr_config_path}")
 
+# largest tile recognized in one pass, kept below the engine's `max_side_len`
+OCR_TILE_SIZE = 1920
+# overlap between neighbouring tiles, so text on a seam is seen whole once
+OCR_TILE_OVERLAP = 96
+# context added around changed areas before they are recognized again
+OCR_DIRTY_MARGIN = 16
+# narrowest and widest a character can be, relative to the line height
+MIN_CHAR_ASPECT = 0.3
+MAX_CHAR_ASPECT = 1.5
+# context kept around a detected box when recognizing it alone
+OCR_BOX_PADDING = 4
+
+
+try:
+    from xxhash import xxh3_128_hexdigest
+except ImportError:
+    xxh3_128_hexdigest = None
+
+type Detections = tuple[tuple[str, Box], ...]
+
 
 def hash_image(img: Image.Image) -> str:
-    return sha256(img.tobytes()).hexdigest()
+    """Content hash of an image, with xxhash when it is installed."""
+    data = img.tobytes()
+    if xxh3_128_hexdigest is not None:
+        digest = xxh3_128_hexdigest(data)
+    else:
+        digest = blake2b(data, digest_size=16).hexdigest()
+    return f"{digest}-{img.width}x{img.height}"
+
+
+def _detections_size(detections: Detections) -> int:
+    return sys.getsizeof(detections) + sum(
+        sys.getsizeof(txt) + 128 for txt, _ in detections
+    )
+
+
+def _encode_detections(detections: Detections) -> list:
+    return [[txt, box.left, box.top, box.width, box.height] for txt, box in detections]
+
+
+def _decode_detections(data: list) -> Detections:
+    return tuple((txt, Box(*ltwh)) for txt, *ltwh in data)
 
 
 def convert_points_to_ltwh(points: np.ndarray) -> Box:
@@ -41,32 +88,316 @@ def convert_points_to_ltwh(points: np.ndarray) -> Box:
 
 class OCR:
     engine: RapidOCR | None = None
-    img_cache: dict[str, tuple[tuple[str, Box], ...]] = {}
+    img_cache: LRUCache[Detections] = LRUCache(
+        OCR_CACHE_BYTES,
+        sizeof=_detections_size,
+        disk=DiskTier(
+            OCR_CACHE_DIR,
+            OCR_CACHE_DISK_BYTES,
+            encode=_encode_detections,
+            decode=_decode_detections,
+        )
+        if OCR_CACHE_DIR
+        else None,
+    )
 
     def __new__(cls):
-        if cls.engine is None:
+        if cls.engine is None and not OCR_WORKERS:
             cls.engine = RapidOCR(config_path=ocr_config_path.as_posix())
         return super().__new__(cls)
 
-    def recognize_text(self, img: Image.Image) -> tuple[tuple[str, Box], ...]:
+    def _engine(self) -> RapidOCR:
+        cls = type(self)
+        if cls.engine is None:
+            cls.engine = RapidOCR(config_path=ocr_config_path.as_posix())
+        return cls.engine
+
+    def recognize_text(self, img: Image.Image) -> Detections:
+        from .ocr_service import get_service, running_service
+
+        # a running service also recognizes images already submitted to it
+        service = get_service() if OCR_WORKERS else running_service()
+        if service is not None:
+            return service.recognize(img)
+
         img_gray = img.convert("L")
         img_hash = hash_image(img_gray)
-        if img_hash in self.img_cache:
+        cached = self.img_cache.get(img_hash)
+        if cached is not None:
             logger.debug(f"Using cached result for image hash: {img_hash}")
-            return self.img_cache[img_hash]
+            return cached
 
-        assert self.engine is not None, "Engine should be initialized in __new__"
-        result = self.engine(np.array(img_gray))
+        with span("ocr.recognize", size=img_gray.size):
+            result = self._engine()(np.array(img_gray))
         assert isinstance(result, RapidOCROutput), (
             "Result should be of type RapidOCROutput"
         )
-        assert result.txts is not None and result.boxes is not None, (
-            "Text recognition failed, txts and boxes should not be None"
-        )
 
-        detections = tuple(
-            (txt, convert_points_to_ltwh(box))
-            for txt, box in zip(result.txts, result.boxes)
+        # RapidOCR leaves txts and boxes unset when the image holds no text
+        detections = (
+            ()
+            if result.txts is None or result.boxes is None
+            else tuple(
+                (txt, convert_points_to_ltwh(box))
+                for txt, box in zip(result.txts, result.boxes)
+            )
         )
-        self.img_cache[img_hash] = detections
+        self.img_cache.put(img_hash, detections)
         return detections
+
+    def detect_boxes(self, img_gray: Image.Image) -> tuple[Box, ...]:
+        """Boxes of the text lines in a grayscale image, without reading them."""
+        key = f"det-{hash_image(img_gray)}"
+        cached = self.img_cache.get(key)
+        if cached is not None:
+            return tuple(box for _, box in cached)
+
+        with span("ocr.detect", size=img_gray.size):
+            result = self._engine()(
+                np.array(img_gray), use_det=True, use_cls=False, use_rec=False
+            )
+        points = () if result.boxes is None else result.boxes
+        boxes = tuple(convert_points_to_ltwh(box) for box in points)
+        self.img_cache.put(key, tuple(("", box) for box in boxes))
+        return boxes
+
+    def read_box(self, img_gray: Image.Image, box: Box) -> str:
+        """Recognize the text of one detected box of a grayscale image."""
+        crop = img_gray.crop((
+            max(box.left - OCR_BOX_PADDING, 0),
+            max(box.top - OCR_BOX_PADDING, 0),
+            min(box.left + box.width + OCR_BOX_PADDING, img_gray.width),
+            min(box.top + box.height + OCR_BOX_PADDING, img_gray.height),
+        ))
+        key = f"rec-{hash_image(crop)}"
+        cached = self.img_cache.get(key)
+        if cached is not None:
+            return cached[0][0]
+
+        with span("ocr.recognize", box=box):
+            result = self._engine()(
+                np.array(crop), use_det=False, use_cls=False, use_rec=True
+            )
+        txt = " ".join(result.txts or ())
+        self.img_cache.put(key, ((txt, box),))
+        return txt
+
+    def find_text(
+        self,
+        img: Image.Image,
+        query: str,
+        *,
+        n: int = 1,
+        case_sensitive: bool = False,
+        full_text: bool = False,
+        max_distance: int = 0,
+    ) -> list[tuple[str, Box]]:
+        """Find up to `n` text boxes matching the query, reading as few as possible.
+
+        Text lines are detected first, and only those wide enough for the
+        query are recognized, in reading order, until `n` of them match.
+        """
+        from .ocr_service import running_service
+
+        img_gray = img.convert("L")
+        detections = self.img_cache.get(hash_image(img_gray))
+        if detections is None and (OCR_WORKERS or running_service() is not None):
+            # workers only run the full pipeline
+            detections = self.recognize_text(img)
+        if detections is not None:
+            return TextIndex(detections).search(
+                query,
+                case_sensitive=case_sensitive,
+                full_text=full_text,
+                max_distance=max_distance,
+            )[:n]
+
+        length = len(query.strip() if full_text else query)
+        found = []
+        for box in self.detect_boxes(img_gray):
+            if not _can_hold(box, length, full_text, max_distance):
+                continue
+            txt = self.read_box(img_gray, box)
+            if text_matches(
+                query,
+                txt,
+                case_sensitive=case_sensitive,
+                full_text=full_text,
+                max_distance=max_distance,
+            ):
+                found.append((txt, box))
+                if len(found) >= n:
+                    break
+        return found
+
+
+def _can_hold(box: Box, length: int, full_text: bool, max_distance: int) -> bool:
+    """Whether a text line of this size can contain a string of that length."""
+    if box.height == 0:
+        return False
+    chars = box.width / box.height
+    if chars < (length - max_distance) * MIN_CHAR_ASPECT:
+        return False
+    return not full_text or chars <= (length + max_distance + 1) * MAX_CHAR_ASPECT
+
+
+def _tile_spans(length: int) -> list[tuple[int, int, int, int]]:
+    """Split an axis into overlapping tiles.
+
+    Returns `(start, end, core_start, core_end)` per tile; the cores partition
+    the axis and decide which tile owns a detection.
+    """
+    if length <= OCR_TILE_SIZE:
+        return [(0, length, 0, length)]
+    stride = OCR_TILE_SIZE - OCR_TILE_OVERLAP
+    count = -(-(length - OCR_TILE_OVERLAP) // stride)
+    starts = [i * (length - OCR_TILE_SIZE) // (count - 1) for i in range(count)]
+    spans = []
+    for i, start in enumerate(starts):
+        end = start + OCR_TILE_SIZE
+        core_start = 0 if i == 0 else spans[-1][3]
+        core_end = length if i == len(starts) - 1 else (starts[i + 1] + end) // 2
+        spans.append((start, end, core_start, core_end))
+    return spans
+
+
+def frame_tiles(frame: Frame) -> list[tuple[Box, Box]]:
+    """The `(tile, core)` boxes a frame is recognized in."""
+    width, height = frame.size
+    return [
+        (
+            Box(left=x0, top=y0, width=x1 - x0, height=y1 - y0),
+            Box(left=cx0, top=cy0, width=cx1 - cx0, height=cy1 - cy0),
+        )
+        for y0, y1, cy0, cy1 in _tile_spans(height)
+        for x0, x1, cx0, cx1 in _tile_spans(width)
+    ]
+
+
+def recognize_tile(frame: Frame, tile: Box, core: Box) -> list[tuple[str, Box]]:
+    """Recognize one tile, keeping the detections centered in its core."""
+    detections = []
+    for txt, box in OCR().recognize_text(frame.image(tile)):
+        box = box.resolve(tile)
+        if box.center in core:
+            detections.append((txt, box))
+    return detections
+
+
+def _stale_areas(
+    changed: list[Box], previous: list[tuple[str, Box]], tile: Box
+) -> list[Box]:
+    """Areas of a tile to recognize again after the given changes.
+
+    Each changed box grows by a margin and absorbs the previous detections it
+    touches, so edited text is always recognized whole.
+    """
+    areas = [
+        Box(
+            left=box.left - OCR_DIRTY_MARGIN,
+            top=box.top - OCR_DIRTY_MARGIN,
+            width=box.width + 2 * OCR_DIRTY_MARGIN,
+            height=box.height + 2 * OCR_DIRTY_MARGIN,
+        )
+        for box in changed
+    ]
+    grown = True
+    while grown:
+        grown = False
+        for i, area in enumerate(areas):
+            for _, box in previous:
+                if area.overlaps(box) and area.union(box) != area:
+                    area = areas[i] = area.union(box)
+                    grown = True
+        merged: list[Box] = []
+        for area in areas:
+            for k, other in enumerate(merged):
+                if area.overlaps(other):
+                    merged[k] = other.union(area)
+                    grown = True
+                    break
+            else:
+                merged.append(area)
+        areas = merged
+    return [area.intersect(tile) for area in areas if area.overlaps(tile)]
+
+
+def _changed_areas(
+    frame: Frame, tile: Box
+) -> tuple[list[tuple[str, Box]], list[Box]] | None:
+    """Previous detections still valid in a tile and the areas to recognize again.
+
+    Returns None when the whole tile has to be recognized.
+    """
+    previous = None
+    if frame.previous is not None:
+        previous = frame.previous.cache.get(("ocr_tile", tile))
+    if previous is None:
+        return None
+
+    areas = _stale_areas(frame.dirty_boxes(tile), previous, tile)
+    if sum(area.width * area.height for area in areas) * 2 > tile.width * tile.height:
+        return None
+    kept = [
+        (txt, box)
+        for txt, box in previous
+        if not any(box.overlaps(area) for area in areas)
+    ]
+    return kept, areas
+
+
+def update_tile(frame: Frame, tile: Box, core: Box) -> list[tuple[str, Box]]:
+    """Recognize a tile, reusing the previous frame's text where nothing changed."""
+    changed = _changed_areas(frame, tile)
+    if changed is None:
+        return recognize_tile(frame, tile, core)
+    detections, areas = changed
+    logger.debug(f"Recognizing {len(areas)} changed area(s) of tile {tile}")
+
+    for area in areas:
+        for txt, box in OCR().recognize_text(frame.image(area)):
+            box = box.resolve(area)
+            if box.center in core:
+                detections.append((txt, box))
+    detections.sort(key=lambda detection: (detection[1].top, detection[1].left))
+    return detections
+
+
+def text_index(frame: Frame) -> TextIndex:
+    """Recognize the whole frame once and index its text.
+
+    Every TextElement located within the frame answers from this index. Tiles
+    that did not change since the previous tracked frame keep its text, and
+    changed tiles only recognize their changed areas again.
+    """
+    index = frame.cache.get("text_index")
+    if index is None:
+        detections = []
+        for tile, core in frame_tiles(frame):
+            key = ("ocr_tile", tile)
+            tile_detections = frame.reuse(key, tile)
+            if tile_detections is None:
+                tile_detections = frame.cache[key] = update_tile(frame, tile, core)
+            detections.extend(tile_detections)
+        index = frame.cache["text_index"] = TextIndex(detections)
+    return index
+
+
+def prefetch_text(frame: Frame) -> list[Future[Detections]]:
+    """Start recognizing the text of a frame in the OCR service.
+
+    Only the areas `text_index` would recognize are submitted, so a later
+    `text_index` of the frame just waits for the results, and the time spent
+    moving the mouse or typing in between is not lost.
+    """
+    from .ocr_service import get_service
+
+    service = get_service()
+    futures = []
+    for tile, _ in frame_tiles(frame):
+        if frame.reuse(("ocr_tile", tile), tile) is not None:
+            continue
+        changed = _changed_areas(frame, tile)
+        areas = [tile] if changed is None else changed[1]
+        futures.extend(service.submit(frame.image(area)) for area in areas)
+    return futures
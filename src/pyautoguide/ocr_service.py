@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from .constants import OCR_WORKERS
+from .ocr import OCR, Detections, hash_image, ocr_config_path
+from .shapes import Box
+
+logger = logging.getLogger(__name__)
+
+# engine of the current worker process, built by `_init_worker`
+_engine = None
+
+
+def _follow[T](shared: Future[T]) -> Future[T]:
+    """A future of its own for one caller, completed along with `shared`.
+
+    Cancelling it, as `asyncio.wrap_future` does when its awaiter is
+    cancelled, leaves `shared` and the other callers waiting on it untouched.
+    """
+    future: Future[T] = Future()
+
+    def done(shared: Future[T]) -> None:
+        if not future.set_running_or_notify_cancel():
+            return
+        exception = shared.exception()
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(shared.result())
+
+    shared.add_done_callback(done)
+    return future
+
+
+def _init_worker(config_path: str) -> None:
+    global _engine
+    from rapidocr import RapidOCR
+
+    _engine = RapidOCR(config_path=config_path)
+
+
+def _recognize_shared(
+    name: str, shape: tuple[int, int]
+) -> list[tuple[str, int, int, int, int]]:
+    """Recognize a grayscale image held in shared memory, in a worker process."""
+    assert _engine is not None, "Engine should be initialized in _init_worker"
+    shm = SharedMemory(name=name, track=False)
+    try:
+        img = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf).copy()
+    finally:
+        shm.close()
+
+    result = _engine(img)
+    if result.txts is None or result.boxes is None:
+        return []
+    detections = []
+    for txt, points in zip(result.txts, result.boxes):
+        left, top = points.min(axis=0).astype(int).tolist()
+        right, bottom = points.max(axis=0).astype(int).tolist()
+        detections.append((txt, left, top, right - left, bottom - top))
+    return detections
+
+
+class OCRService:
+    """OCR engines running in worker processes.
+
+    Images are handed to the workers through shared memory and recognized
+    concurrently with the calling thread. Results share the `OCR` cache, and
+    an image already being recognized is not submitted twice.
+    """
+
+    def __init__(
+        self, workers: int = max(OCR_WORKERS, 1), config_path: Path = ocr_config_path
+    ):
+        self.workers = workers
+        self._pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(config_path.as_posix(),),
+        )
+        self._pending: dict[str, Future[Detections]] = {}
+        self._lock = threading.Lock()
+        logger.info(f"Started OCR service with {workers} worker(s)")
+
+    def __enter__(self) -> OCRService:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def submit(self, img: Image.Image) -> Future[Detections]:
+        """Start recognizing an image and return a future of its detections."""
+        img_gray = img.convert("L")
+        img_hash = hash_image(img_gray)
+        cached = OCR.img_cache.get(img_hash)
+        if cached is not None:
+            future: Future[Detections] = Future()
+            future.set_result(cached)
+            return future
+
+        with self._lock:
+            shared = self._pending.get(img_hash)
+            if shared is not None:
+                return _follow(shared)
+            shared = self._pending[img_hash] = Future()
+        try:
+            self._dispatch(img_hash, np.asarray(img_gray), shared)
+        except BaseException:
+            with self._lock:
+                self._pending.pop(img_hash, None)
+            raise
+        return _follow(shared)
+
+    def _dispatch(
+        self, img_hash: str, pixels: np.ndarray, future: Future[Detections]
+    ) -> None:
+        shm = SharedMemory(create=True, size=max(pixels.nbytes, 1))
+        try:
+            np.ndarray(pixels.shape, dtype=np.uint8, buffer=shm.buf)[:] = pixels
+            job = self._pool.submit(_recognize_shared, shm.name, pixels.shape)
+        except BaseException:
+            shm.close()
+            shm.unlink()
+            raise
+
+        def done(job: Future) -> None:
+            shm.close()
+            shm.unlink()
+            with self._lock:
+                self._pending.pop(img_hash, None)
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                rows = job.result()
+            except BaseException as e:
+                future.set_exception(e)
+                return
+            detections = tuple((txt, Box(*ltwh)) for txt, *ltwh in rows)
+            OCR.img_cache.put(img_hash, detections)
+            future.set_result(detections)
+
+        job.add_done_callback(done)
+
+    def recognize(self, img: Image.Image) -> Detections:
+        """Recognize an image, blocking until a worker is done with it."""
+        return self.submit(img).result()
+
+    async def arecognize(self, img: Image.Image) -> Detections:
+        """Recognize an image without blocking the event loop."""
+        return await asyncio.wrap_future(self.submit(img))
+
+    def close(self) -> None:
+        """Stop the workers, cancelling images not being recognized yet."""
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+
+_service: OCRService | None = None
+_service_lock = threading.Lock()
+
+
+def get_service() -> OCRService:
+    """The OCR service shared by the whole process, started on first use."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = OCRService()
+        return _service
+
+
+def running_service() -> OCRService | None:
+    """The shared OCR service, if it was started."""
+    return _service
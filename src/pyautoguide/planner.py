@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import heapq
+import json
+import logging
+import math
+import os
+import tempfile
+import threading
+from collections.abc import Iterable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .telemetry import span
+
+if TYPE_CHECKING:
+    import graphviz
+
+logger = logging.getLogger(__name__)
+
+# weight of the newest sample in the running averages of a transition
+STATS_SMOOTHING = 0.3
+# assumed duration of a transition never measured, in seconds
+DEFAULT_TRANSITION_SECONDS = 1.0
+# floors keeping route costs finite and positive
+MIN_TRANSITION_SECONDS = 1e-3
+MIN_SUCCESS_RATE = 0.05
+
+
+class NavigationError(Exception):
+    """Custom exception for navigation errors."""
+
+    pass
+
+
+@dataclass(slots=True)
+class TransitionStats:
+    """Exponentially weighted duration and failure rate of one transition."""
+
+    duration: float = DEFAULT_TRANSITION_SECONDS
+    failure_rate: float = 0.0
+    samples: int = 0
+
+    def record(self, seconds: float, failed: bool = False) -> None:
+        """Add the outcome of one attempt."""
+        if not failed:
+            if self.samples == 0:
+                self.duration = seconds
+            else:
+                self.duration += STATS_SMOOTHING * (seconds - self.duration)
+        self.failure_rate += STATS_SMOOTHING * (float(failed) - self.failure_rate)
+        self.samples += 1
+
+    @property
+    def expected_cost(self) -> float:
+        """Expected seconds until the transition succeeds, retrying failures."""
+        return max(self.duration, MIN_TRANSITION_SECONDS) / max(
+            1 - self.failure_rate, MIN_SUCCESS_RATE
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class Route:
+    """Events to dispatch, in order, to get from `source` to the target."""
+
+    source: str
+    target: str
+    events: tuple[str, ...]
+    # expected seconds to follow the route
+    cost: float = 0.0
+
+
+@dataclass(slots=True)
+class _Tree:
+    """Cheapest routes from every node to one target."""
+
+    cost: dict[str, float]
+    # transitions on the chosen cheapest route from each node
+    hops: dict[str, int]
+    # first step of a cheapest route from each node, as (event, next node)
+    step: dict[str, tuple[str, str]]
+
+
+class NavigationGraph:
+    """Navigation transitions between workflow elements.
+
+    The graph is updated as navigations are registered. Each transition costs
+    its expected duration, learned from the outcomes recorded for it, and
+    unmeasured transitions all cost the same. Cheapest routes to a target
+    are computed once, for every source at a time, and reused until the
+    graph or its costs change. Equally cheap routes are told apart by their
+    number of transitions, then by the order the transitions were added.
+    """
+
+    def __init__(self) -> None:
+        self._edges: dict[str, list[tuple[str, str]]] = {}
+        # incoming transitions as (event, source, order of registration)
+        self._reverse: dict[str, list[tuple[str, str, int]]] = {}
+        self._edge_count = 0
+        self.stats: dict[str, TransitionStats] = {}
+        self.version = 0
+        self._trees: dict[str, _Tree] = {}
+        self._trees_version = 0
+        self._lock = threading.Lock()
+
+    def __contains__(self, node: str) -> bool:
+        return node in self._edges
+
+    def __len__(self) -> int:
+        return len(self._edges)
+
+    @property
+    def nodes(self) -> list[str]:
+        """Every node, in the order it was added."""
+        return list(self._edges)
+
+    def add_node(self, node: str) -> None:
+        """Add a node without transitions."""
+        if node not in self._edges:
+            self._edges[node] = []
+            self._reverse[node] = []
+            self.version += 1
+
+    def add_edge(self, source: str, target: str, event: str) -> None:
+        """Add a transition from `source` to `target`, triggered by `event`."""
+        self.add_node(source)
+        self.add_node(target)
+        self._edges[source].append((event, target))
+        self._reverse[target].append((event, source, self._edge_count))
+        self._edge_count += 1
+        self.version += 1
+
+    def record(self, event: str, seconds: float, failed: bool = False) -> None:
+        """Record how long a transition took and whether it failed."""
+        self.stats.setdefault(event, TransitionStats()).record(seconds, failed)
+        self.version += 1
+
+    def cost(self, event: str) -> float:
+        """Expected seconds for a transition to succeed."""
+        stats = self.stats.get(event)
+        return stats.expected_cost if stats else DEFAULT_TRANSITION_SECONDS
+
+    def load_stats(self, path: str | Path) -> None:
+        """Read transition statistics saved by `save_stats`, if the file exists."""
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable transition stats {path}: {e}")
+            return
+        self.stats.update(
+            (event, TransitionStats(**values)) for event, values in data.items()
+        )
+        self.version += 1
+
+    def save_stats(self, path: str | Path) -> None:
+        """Write the transition statistics as JSON."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # write then rename, so a crash never leaves a truncated file
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(
+                {event: asdict(stats) for event, stats in self.stats.items()},
+                f,
+                indent=2,
+            )
+        os.replace(tmp, path)
+
+    def successors(self, node: str) -> list[str]:
+        """Nodes reachable from `node` with one transition."""
+        return list(dict.fromkeys(target for _, target in self._edges.get(node, ())))
+
+    def reaches(self, source: str, target: str) -> bool:
+        """Whether some route leads from `source` to `target`."""
+        return source in self._tree(target).cost
+
+    def _tree(self, target: str) -> _Tree:
+        with self._lock:
+            if self._trees_version != self.version:
+                self._trees.clear()
+                self._trees_version = self.version
+            tree = self._trees.get(target)
+            if tree is None:
+                tree = self._trees[target] = self._build_tree(target)
+            return tree
+
+    def _build_tree(self, target: str) -> _Tree:
+        # Dijkstra backwards from the target; among equally cheap first
+        # steps, the one with the fewest hops, then the earliest registered
+        cost = {target: 0.0}
+        hops = {target: 0}
+        rank: dict[str, tuple[int, int]] = {}
+        step: dict[str, tuple[str, str]] = {}
+        done: set[str] = set()
+        heap = [(0.0, target)]
+        while heap:
+            node_cost, node = heapq.heappop(heap)
+            if node in done:
+                continue
+            done.add(node)
+            for event, source, order in self._reverse.get(node, ()):
+                if source in done:
+                    continue
+                source_cost = node_cost + self.cost(event)
+                source_rank = (hops[node] + 1, order)
+                if source not in cost or (
+                    source_cost < cost[source]
+                    and not math.isclose(source_cost, cost[source])
+                ):
+                    cost[source] = source_cost
+                    heapq.heappush(heap, (source_cost, source))
+                elif not (
+                    math.isclose(source_cost, cost[source])
+                    and source_rank < rank[source]
+                ):
+                    continue
+                hops[source] = source_rank[0]
+                rank[source] = source_rank
+                step[source] = (event, node)
+        return _Tree(cost, hops, step)
+
+    def route(self, sources: Iterable[str], target: str) -> Route:
+        """The cheapest route from any of the sources to the target.
+
+        Ties go to the route with the fewest transitions, then to the source
+        and transitions registered first, so the stats recorded while
+        following it can later tell the routes apart. Raises NavigationError
+        when no source leads to the target.
+        """
+        with span("plan", target=target):
+            tree = self._tree(target)
+        reachable = [source for source in sources if source in tree.cost]
+        if not reachable:
+            raise NavigationError(f"No path found from present screen to {target}")
+        cheapest = min(tree.cost[source] for source in reachable)
+        order = {node: index for index, node in enumerate(self._edges)}
+        source = node = min(
+            (
+                source
+                for source in reachable
+                if math.isclose(tree.cost[source], cheapest)
+            ),
+            key=lambda source: (tree.hops[source], order[source]),
+        )
+        events = []
+        while node != target:
+            event, node = tree.step[node]
+            events.append(event)
+        return Route(source=source, target=target, events=tuple(events), cost=cheapest)
+
+    def diagram(self, name: str = "WorkFlow") -> graphviz.Digraph:
+        """Render the graph with Graphviz."""
+        try:
+            import graphviz
+        except ImportError:
+            raise ImportError(
+                "graphviz is not installed. Please install it using 'pip install pyautoguide[diagrams]'."
+            )
+
+        dot = graphviz.Digraph(name, graph_attr={"rankdir": "LR"})
+        for node in self._edges:
+            dot.node(node, shape="rectangle", style="rounded")
+        for source, edges in self._edges.items():
+            for event, target in edges:
+                dot.edge(source, target, label=event)
+        return dot
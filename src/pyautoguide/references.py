@@ -1,17 +1,22 @@
+import sys
 from abc import ABC, abstractmethod
+from collections.abc import Iterable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
 from pathlib import Path
 from typing import Callable, Literal, overload, override
 from warnings import deprecated
 
-import pyautogui as gui
-import pyscreeze
 from PIL import Image
 
 from ._types import Direction, MouseButton
 from .actions import locate_on_screen, move_and_click
 from .box_array import BoxArray
+from .constants import MATCH_WORKERS
+from .frame import current_frame, screenshot, snapshot
 from .shapes import Box, BoxSpec
-from .utils import get_file
+from .telemetry import span
+from .utils import IMAGE_FILE_EXTENSIONS
 
 
 class ElementNotFoundError(Exception):
@@ -20,6 +25,19 @@ class ElementNotFoundError(Exception):
     pass
 
 
+def _is_image_not_found(error: Exception) -> bool:
+    """Whether a custom locator reported a miss the PyAutoGUI way.
+
+    Only the modules already imported can have raised the error, so neither
+    is imported just to check it.
+    """
+    return any(
+        isinstance(error, module.ImageNotFoundException)
+        for name in ("pyautogui", "pyscreeze")
+        if (module := sys.modules.get(name)) is not None
+    )
+
+
 class ReferenceElement(ABC):
     """Base class for reference elements used to identify scenes."""
 
@@ -50,6 +68,21 @@ class ReferenceElement(ABC):
         """Detect the presence of the reference element."""
         raise NotImplementedError("Subclasses must implement this method")
 
+    def is_visible(self, region: BoxSpec | None = None) -> bool:
+        """Check whether the element is on screen, without collecting matches."""
+        return self.locate(region, n=1, error="coerce") is not None
+
+    async def alocate(
+        self,
+        region: BoxSpec | None = None,
+        n: int = 1,
+        error: Literal["raise", "coerce"] = "raise",
+    ) -> BoxArray | None:
+        """Async `locate`, matching and OCR running in a worker thread."""
+        from .aio import alocate
+
+        return await alocate(self, region, n, error)
+
     @deprecated("Use `locate().click()` instead.")
     def locate_and_click(
         self,
@@ -82,11 +115,15 @@ class ImageElement(ReferenceElement):
         confidence: float = 0.999,
         region: BoxSpec | None = None,
         locator: Callable[[Image.Image, Image.Image], BoxArray] | None = None,
+        pyramid: int = 0,
+        scales: Sequence[float] = (1.0,),
     ):
         self.path = path
         self.confidence = confidence
         self.region = region
         self.locator = locator
+        self.pyramid = pyramid
+        self.scales = scales
         self.name = Path(path).stem if isinstance(path, str) else Path(path[0]).stem
 
     @overload
@@ -112,20 +149,12 @@ class ImageElement(ReferenceElement):
         error: Literal["raise", "coerce"] = "raise",
     ):
         """Method to detect the presence of the image in the current screen."""
-        if isinstance(self.path, str):
-            path = [self.path]  # Ensure path is a list for consistency
-        else:
-            path = self.path
-
         all_locations: BoxArray = BoxArray()
-        for image_path in path:
-            try:
-                locations = locate_on_screen(
-                    image_path,
-                    region=region if region else self.region,
-                    confidence=self.confidence,
-                    locator=self.locator,
-                    limit=n - len(all_locations),  # Only get remaining needed locations
+        with span("locate", element=self.name, region=region or self.region):
+            for image_path in self.paths:
+                # Only get remaining needed locations
+                locations = self.locate_variant(
+                    image_path, region, n - len(all_locations)
                 )
                 if locations is not None:
                     all_locations += locations
@@ -133,8 +162,6 @@ class ImageElement(ReferenceElement):
                 # If we have enough detections, return them
                 if len(all_locations) >= n:
                     return all_locations[:n]
-            except (gui.ImageNotFoundException, pyscreeze.ImageNotFoundException):
-                continue
 
         if all_locations:
             return all_locations
@@ -146,17 +173,65 @@ class ImageElement(ReferenceElement):
                     f"{self} not found on screen in region {region}."
                 )
 
+    @override
+    def is_visible(self, region: BoxSpec | None = None) -> bool:
+        """Stop at the first variant with a match above the confidence."""
+        with span("locate", element=self.name, region=region or self.region):
+            return any(
+                self.locate_variant(image_path, region, 1, first=True)
+                for image_path in self.paths
+            )
+
+    def locate_variant(
+        self,
+        image_path: str,
+        region: BoxSpec | None = None,
+        n: int = 1,
+        first: bool = False,
+    ) -> BoxArray | None:
+        """Locate a single image variant of the element."""
+        try:
+            return locate_on_screen(
+                image_path,
+                region=region if region else self.region,
+                confidence=self.confidence,
+                locator=self.locator,
+                limit=n,
+                first=first,
+                pyramid=self.pyramid,
+                scales=self.scales,
+            )
+        except Exception as e:
+            if _is_image_not_found(e):
+                return None
+            raise
+
+    @property
+    def paths(self) -> list[str]:
+        """All image variants of the element."""
+        return [self.path] if isinstance(self.path, str) else self.path
+
     def __repr__(self) -> str:
         return f"ImageElement: {self.path}"
 
 
 class ReferenceImageDir:
+    """A directory of reference images, indexed once and decoded into memory."""
+
     def __init__(self, dir_path: Path | str) -> None:
         if isinstance(dir_path, str):
             dir_path = Path(dir_path)
         assert dir_path.is_dir(), f"{dir_path} is not a valid directory."
         self.dir_path = dir_path
         self.images: dict[str, ImageElement] = {}
+        self.files = self._index()
+
+    def _index(self) -> dict[str, Path]:
+        files: dict[str, Path] = {}
+        for path in sorted(self.dir_path.iterdir()):
+            if path.suffix in IMAGE_FILE_EXTENSIONS:
+                files.setdefault(path.stem, path)
+        return files
 
     def __call__(
         self,
@@ -164,24 +239,70 @@ class ReferenceImageDir:
         region: BoxSpec | None = None,
         confidence: float = 0.999,
         locator: Callable[[Image.Image, Image.Image], BoxArray] | None = None,
+        pyramid: int = 0,
+        scales: Sequence[float] = (1.0,),
     ) -> ImageElement:
-        """Get an ImageElement from the reference directory."""
+        """Get an ImageElement from the reference directory.
+
+        `scales` lets one reference match at several DPI or zoom levels.
+        """
+        from .templates import templates
+
         if image_name not in self.images:
-            image_path = get_file(self.dir_path, name=image_name)
+            if image_name not in self.files:
+                self.files = self._index()
+            if image_name not in self.files:
+                raise FileNotFoundError(
+                    f"File {image_name} not found in directory {self.dir_path}"
+                )
+            image_path = self.files[image_name]
+            templates.get(image_path)
             self.images[image_name] = ImageElement(
-                str(image_path), region=region, confidence=confidence, locator=locator
+                str(image_path),
+                region=region,
+                confidence=confidence,
+                locator=locator,
+                pyramid=pyramid,
+                scales=scales,
             )
         return self.images[image_name]
 
+    def preload(self) -> None:
+        """Decode every image in the directory into the template store."""
+        from .templates import templates
+
+        for path in self.files.values():
+            templates.get(path)
+
+    def refresh(self) -> list[Path]:
+        """Re-index the directory and reload images that changed on disk.
+
+        Returns the paths that were reloaded.
+        """
+        from .templates import templates
+
+        self.files = self._index()
+        loaded = [path for path in self.files.values() if path in templates]
+        return templates.refresh(loaded)
+
 
 def image(
     path: str,
     region: BoxSpec | None = None,
     confidence: float = 0.999,
     locator: Callable[[Image.Image, Image.Image], BoxArray] | None = None,
+    pyramid: int = 0,
+    scales: Sequence[float] = (1.0,),
 ) -> ImageElement:
     """Create an image reference element."""
-    return ImageElement(path, confidence=confidence, region=region, locator=locator)
+    return ImageElement(
+        path,
+        confidence=confidence,
+        region=region,
+        locator=locator,
+        pyramid=pyramid,
+        scales=scales,
+    )
 
 
 class TextElement(ReferenceElement):
@@ -193,11 +314,13 @@ class TextElement(ReferenceElement):
         region: BoxSpec | None = None,
         case_sensitive: bool = False,
         full_text: bool = False,
+        max_distance: int = 0,
     ):
         self.text = text
         self.region = region
         self.case_sensitive = case_sensitive
         self.full_text = full_text
+        self.max_distance = max_distance
         if not case_sensitive:
             self.text = self.text.lower()
         self.name = text
@@ -225,26 +348,42 @@ class TextElement(ReferenceElement):
         n: int = 1,
         error: Literal["raise", "coerce"] = "raise",
     ):
-        """Method to detect the presence of the text in the current screen."""
-        from .ocr import OCR
+        """Method to detect the presence of the text in the current screen.
 
-        ocr = OCR()
-        region = region or self.region
-        found_regions = []
-
-        for text, detected_region in ocr.recognize_text(
-            gui.screenshot(region=Box.from_spec(region).to_tuple() if region else None)
-        ):
-            if not self.case_sensitive:
-                text = text.lower()
-            if self.full_text and text.strip() == self.text.strip():
-                found_regions.append(detected_region.resolve(base=region))
-            elif not self.full_text and self.text in text:
-                found_regions.append(detected_region.resolve(base=region))
-            # If we have enough detections, return them
-            if len(found_regions) >= n:
-                return BoxArray(found_regions[:n])
+        Inside a `snapshot` block the whole frame is recognized once and shared
+        by every TextElement, whatever its region. Outside one, only the text
+        lines that can hold the text are recognized, until `n` of them match.
+        With `max_distance`, text within that many character edits also
+        matches, to absorb OCR errors.
+        """
+        from .ocr import OCR, text_index
 
+        region = region or self.region
+        region_box = Box.from_spec(region) if region else None
+        frame = current_frame()
+        with span("locate", element=self.name, region=region_box):
+            if frame is not None:
+                detections = text_index(frame).search(
+                    self.text,
+                    region=region_box,
+                    case_sensitive=self.case_sensitive,
+                    full_text=self.full_text,
+                    max_distance=self.max_distance,
+                )[:n]
+            else:
+                detections = [
+                    (text, detected_region.resolve(base=region_box))
+                    for text, detected_region in OCR().find_text(
+                        screenshot(region=region_box),
+                        self.text,
+                        n=n,
+                        case_sensitive=self.case_sensitive,
+                        full_text=self.full_text,
+                        max_distance=self.max_distance,
+                    )
+                ]
+
+        found_regions = [detected_region for _, detected_region in detections]
         if found_regions:
             return BoxArray(found_regions)
         else:
@@ -264,8 +403,73 @@ def text(
     region: BoxSpec | None = None,
     case_sensitive: bool = False,
     full_text: bool = False,
+    max_distance: int = 0,
 ) -> TextElement:
     """Create a text reference element."""
     return TextElement(
-        text=text, region=region, case_sensitive=case_sensitive, full_text=full_text
+        text=text,
+        region=region,
+        case_sensitive=case_sensitive,
+        full_text=full_text,
+        max_distance=max_distance,
     )
+
+
+_executor: ThreadPoolExecutor | None = None
+
+
+def _match_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=MATCH_WORKERS, thread_name_prefix="pyautoguide-match"
+        )
+    return _executor
+
+
+def locate_many(
+    elements: Iterable[ReferenceElement], *, n: int = 1, presence: bool = False
+) -> dict[ReferenceElement, BoxArray | None]:
+    """Locate many elements against one shared frame.
+
+    Every image variant of every `ImageElement` is matched in a shared thread
+    pool (OpenCV releases the GIL), after the frame preprocessing they share
+    is done once. Other elements are located in the calling thread. With
+    `presence`, image matching stops at the first hit of each element.
+    """
+    elements = list(elements)
+    results: dict[ReferenceElement, BoxArray | None] = {}
+    with snapshot() as frame:
+        images = [elem for elem in elements if isinstance(elem, ImageElement)]
+        for elem in images:
+            if elem.locator is None:
+                for level in range(elem.pyramid + 1):
+                    frame.pyramid(level)
+
+        executor = _match_executor()
+        futures = {
+            elem: [
+                executor.submit(
+                    copy_context().run,
+                    elem.locate_variant,
+                    image_path,
+                    None,
+                    1 if presence else n,
+                    presence,
+                )
+                for image_path in elem.paths
+            ]
+            for elem in images
+        }
+        for elem in elements:
+            if not isinstance(elem, ImageElement):
+                results[elem] = elem.locate(n=n, error="coerce")
+
+        for elem, variant_futures in futures.items():
+            found = BoxArray()
+            for future in variant_futures:
+                locations = future.result()
+                if locations is not None:
+                    found += locations
+            results[elem] = found[:n] if found else None
+    return {elem: results[elem] for elem in elements}
@@ -4,6 +4,7 @@ from typing import Callable, TypedDict
 
 from statemachine import State
 
+from .frame import snapshot
 from .references import ReferenceElement
 from .shapes import Box
 from .utils import is_valid_variable_name
@@ -54,7 +55,8 @@ class Scene(State):
         """Check if any reference element is currently on screen."""
         # TODO: Refactor after text recognition is implemented
         # elements = (elem for elem in self.elements if isinstance(elem, ReferenceImage))
-        return all(elem.locate(region, n=1) for elem in self.elements)
+        with snapshot():
+            return all(elem.is_visible(region) for elem in self.elements)
 
     def __repr__(self):
         return f"Scene({self.name!r}, elements={len(self.elements)})"
@@ -1,11 +1,8 @@
 from __future__ import annotations
 
-import time
-from random import random
 from typing import Callable
 
 import networkx as nx
-import pyautogui as gui
 from PIL import Image
 from statemachine import State, StateMachine
 from statemachine.factory import StateMachineMetaclass
@@ -13,9 +10,11 @@ from statemachine.states import States
 from statemachine.transition_list import TransitionList
 
 from .box_array import BoxArray
+from .frame import snapshot
 from .references import ImageElement, ReferenceElement
 from .scene import Scene
 from .shapes import Box
+from .waiting import WaitResult, wait_for
 
 
 class SceneRecognitionError(Exception):
@@ -53,7 +52,8 @@ def build_dynamic_state_machine(
 
 def get_current_scene(scenes: list[Scene], region: Box | None = None) -> Scene:
     """Get the current scene from the list of scenes."""
-    current_scenes = [scene for scene in scenes if scene.is_on_screen(region)]
+    with snapshot():
+        current_scenes = [scene for scene in scenes if scene.is_on_screen(region)]
     if len(current_scenes) == 1:
         return current_scenes[0]
     elif len(current_scenes) > 1:
@@ -93,10 +93,10 @@ class Session:
 
     def expect(self, target_scene: Scene, **kwargs):
         """Navigate to a specific scene."""
-        if target_scene.is_on_screen():
-            return
-
-        present_scene = get_current_scene(self._scenes_list)
+        with snapshot():
+            if target_scene.is_on_screen():
+                return
+            present_scene = get_current_scene(self._scenes_list)
         all_paths = list(
             nx.all_simple_paths(
                 self.graph, source=present_scene.name, target=target_scene.name
@@ -155,27 +155,35 @@ class Session:
         self,
         target: Scene | ReferenceElement,
         interval: float = 1,
-        keep_busy: bool = True,
-    ):
+        keep_busy: bool = False,
+        timeout: float | None = None,
+    ) -> WaitResult:
         """Wait until the target scene or reference element is on screen."""
-        found = False
-        while not found:
-            if isinstance(target, Scene):
-                found = target.is_on_screen()
-            elif isinstance(target, ReferenceElement):
-                found = target.locate(n=1) is not None
-            else:
-                raise TypeError("Target must be a Scene or ReferenceElement.")
-            if not found:
-                w, h = gui.size()
-                if keep_busy:
-                    gui.moveTo(
-                        w * random(),
-                        h * random(),
-                        duration=2 * interval * random(),
-                        tween=gui.easeInOutQuad,  # type: ignore
-                    )
-                time.sleep(interval)
+        if not isinstance(target, (Scene, ReferenceElement)):
+            raise TypeError("Target must be a Scene or ReferenceElement.")
+        return wait_for(target, timeout=timeout, interval=interval, keep_busy=keep_busy)
+
+    async def await_until(
+        self,
+        target: Scene | ReferenceElement,
+        interval: float = 1,
+        keep_busy: bool = False,
+        timeout: float | None = None,
+    ) -> WaitResult:
+        """Async `wait_until`, sleeping on the event loop between screen checks."""
+        from .aio import await_for
+
+        if not isinstance(target, (Scene, ReferenceElement)):
+            raise TypeError("Target must be a Scene or ReferenceElement.")
+        return await await_for(
+            target, timeout=timeout, interval=interval, keep_busy=keep_busy
+        )
+
+    async def aexpect(self, target_scene: Scene, **kwargs):
+        """Async `expect`, run in a worker thread."""
+        from .aio import run_blocking
+
+        return await run_blocking(self.expect, target_scene, **kwargs)
 
     def __repr__(self):
         current = self.current_scene
@@ -2,16 +2,15 @@ from __future__ import annotations
 
 import logging
 import re
+from collections.abc import Sequence
 from dataclasses import dataclass
+from functools import cache, lru_cache
 from pathlib import Path
-from typing import TYPE_CHECKING, Self
+from typing import TYPE_CHECKING, NamedTuple, Self
 
-import cv2
 import numpy as np
-import pyautogui as gui
-from pyscreeze import Box as BoxTuple
 
-from ._types import Direction, MouseButton
+from ._types import Color, Direction, HSVRange, MouseButton
 from .utils import direction_to_vector, get_search_region_in_direction
 
 logger = logging.getLogger(__name__)
@@ -19,9 +18,58 @@ logger = logging.getLogger(__name__)
 if TYPE_CHECKING:
     from .box_array import BoxArray
 
+
+class BoxTuple(NamedTuple):
+    """Plain `(left, top, width, height)` tuple, as PyAutoGUI expects regions."""
+
+    left: int
+    top: int
+    width: int
+    height: int
+
+
 axis_pattern = re.compile(r"(?P<d>[xy]):\(?(?P<i>\d+)(?:-(?P<j>\d+))?\)?/(?P<n>\d+)")
 
 
+@dataclass(frozen=True, slots=True)
+class RegionSpec:
+    """A region spec such as `"x:2/3 y:(1-2)/3"` parsed into screen fractions.
+
+    Each axis is stored as `(start, span, parts)`: the region skips `start`
+    of `parts` equal slices of the screen and covers the next `span` slices.
+    """
+
+    x: tuple[int, int, int] = (0, 1, 1)
+    y: tuple[int, int, int] = (0, 1, 1)
+
+    @staticmethod
+    @cache
+    def parse(spec: str) -> RegionSpec:
+        """Parse a spec string, once per distinct string."""
+        axes = {}
+        for axis, i, j, n in axis_pattern.findall(spec):
+            i, j = int(i), int(j) if j else int(i)
+            axes[axis] = (i - 1, j - i + 1, int(n))
+        return RegionSpec(**axes)
+
+    def resolve(self, shape: tuple[int, int]) -> Box:
+        """Resolve against a (height, width) screen shape."""
+        x_start, x_span, x_parts = self.x
+        y_start, y_span, y_parts = self.y
+        column, row = shape[1] // x_parts, shape[0] // y_parts
+        return Box(
+            left=x_start * column,
+            top=y_start * row,
+            width=x_span * column,
+            height=y_span * row,
+        )
+
+
+@lru_cache(maxsize=1024)
+def _resolve_spec(spec: str, shape: tuple[int, int]) -> Box:
+    return RegionSpec.parse(spec).resolve(shape)
+
+
 @dataclass(frozen=True, slots=True, init=False)
 class Box:
     left: int
@@ -36,12 +84,12 @@ class Box:
         object.__setattr__(self, "height", int(height))
 
     def to_tuple(self) -> BoxTuple:
-        """Convert to a pyscreeze Box."""
+        """Convert to a plain tuple."""
         return BoxTuple(self.left, self.top, self.width, self.height)
 
     @classmethod
     def from_tuple(cls, box: BoxTuple) -> Box:
-        """Create a Region from a pyscreeze Box."""
+        """Create a Region from a `(left, top, width, height)` tuple."""
         return cls(left=box.left, top=box.top, width=box.width, height=box.height)
 
     @property
@@ -54,26 +102,22 @@ class Box:
         if isinstance(spec, Box):
             return spec
         if shape is None:
-            img = np.array(gui.screenshot())
-            shape = (img.shape[0]), (img.shape[1])
-
-        default_box = {"left": 0, "top": 0, "width": shape[1], "height": shape[0]}
+            from .capture import screen_size
+            from .frame import current_frame
 
-        axis_mapping = {"x": ("left", "width", 1), "y": ("top", "height", 0)}
-        for axis, i, j, n in axis_pattern.findall(spec):
-            alignment, size_attr, dim_index = axis_mapping[axis]
-            size = shape[dim_index] // int(n)
-            i, j = int(i), int(j) if j else int(i)
-            default_box.update({
-                alignment: (i - 1) * size,
-                size_attr: (j - i + 1) * size,
-            })
-
-        return cls(**default_box)
+            frame = current_frame()
+            if frame is not None:
+                shape = frame.shape
+            else:
+                width, height = screen_size()
+                shape = height, width
+        return _resolve_spec(spec, shape)
 
     def log_screenshot(self, filename: str | Path):
         """Take a screenshot of the box and save it to a file."""
-        img = gui.screenshot(region=self.to_tuple())
+        from .frame import screenshot
+
+        img = screenshot(region=self)
         img.save(filename)
         logger.info(f"Screenshot saved to {filename}")
         return self
@@ -114,6 +158,23 @@ class Box:
             and self.top <= point.y <= self.top + self.height
         )
 
+    def overlaps(self, other: Box) -> bool:
+        """Check if two Boxes share any area."""
+        return (
+            self.left < other.left + other.width
+            and other.left < self.left + self.width
+            and self.top < other.top + other.height
+            and other.top < self.top + self.height
+        )
+
+    def union(self, other: Box) -> Box:
+        """Return the smallest Box containing both Boxes."""
+        left = min(self.left, other.left)
+        top = min(self.top, other.top)
+        right = max(self.left + self.width, other.left + other.width)
+        bottom = max(self.top + self.height, other.top + other.height)
+        return Box(left=left, top=top, width=right - left, height=bottom - top)
+
     def intersect(self, other: BoxSpec) -> Box:
         """Return the intersection of two Boxes."""
         if not isinstance(other, Box):
@@ -129,66 +190,85 @@ class Box:
 
     def find_color(
         self,
-        color: tuple[int, int, int],
+        color: Color | Sequence[Color] | None,
         towards: Direction,
         *,
         region: BoxSpec | None = None,
         tolerance: int | None = None,
+        hsv: HSVRange | Sequence[HSVRange] | None = None,
+        min_area: int = 1,
+        max_area: int | None = None,
     ) -> BoxArray:
-        """Find the median pixel with given color in the direction."""
+        """Find blobs of any of the colors in the direction, nearest first.
+
+        `color` is one RGB color or several, each matched within `tolerance`
+        per channel, and `hsv` is one or several ranges of HSV colors. Blobs
+        are kept when their area in pixels is between `min_area` and
+        `max_area`, and ordered by how far their center lies along `towards`.
+        """
+        import cv2
+
         from .box_array import BoxArray
+        from .capture import screen_size
+        from .frame import current_frame, grab
 
         # Determine search region based on direction
         assert isinstance(towards, str), "integer direction is not supported"
-        search_region = get_search_region_in_direction(self, towards, size=gui.size())
+        frame = current_frame()
+        size = frame.size if frame is not None else screen_size()
+        search_region = get_search_region_in_direction(self, towards, size=size)
 
         # Apply optional region constraint
         if region:
             given_region = Box.from_spec(region)
             search_region = search_region.intersect(given_region)
 
-        # Take screenshot of search region
-        img = gui.screenshot(region=search_region.to_tuple())
+        # Cropped from the active frame when there is one
+        pixels = grab(region=search_region)
 
-        # Find connected components of the target color
-        color_array = np.array(color)
-        if tolerance is None:
-            img_color_mask = np.all(np.array(img) == color_array, axis=-1).astype(
-                np.uint8
-            )
-        else:
-            img_color_mask = np.all(
-                np.abs(np.array(img) - color_array) <= tolerance, axis=-1
-            ).astype(np.uint8)
-        n, img_label = cv2.connectedComponents(
-            img_color_mask, connectivity=8, ltype=cv2.CV_32S
+        # Mark the pixels of any of the colors, given as tuples or arrays
+        colors = (
+            [] if color is None else np.asarray(color, dtype=np.int64).reshape(-1, 3)
         )
-
-        # Find all bounding boxes of connected components
-        det_boxes = []
-        for i in range(1, n):
-            mask = img_label == i
-            coords = np.column_stack(np.where(mask))
-            if coords.size == 0:
-                continue
-            y_min, x_min = coords.min(axis=0)
-            y_max, x_max = coords.max(axis=0)
-            # Convert to absolute coordinates
-            det_boxes.append(
-                Box(
-                    left=x_min,
-                    top=y_min,
-                    width=x_max - x_min + 1,
-                    height=y_max - y_min + 1,
+        ranges = (
+            [] if hsv is None else np.asarray(hsv, dtype=np.int64).reshape(-1, 2, 3)
+        )
+        mask = np.zeros(pixels.shape[:2], dtype=np.uint8)
+        spread = tolerance or 0
+        for rgb in colors:
+            lower = np.clip(rgb - spread, 0, 255).astype(np.uint8)
+            upper = np.clip(rgb + spread, 0, 255).astype(np.uint8)
+            mask |= cv2.inRange(pixels, lower, upper)
+        if len(ranges):
+            pixels_hsv = cv2.cvtColor(pixels, cv2.COLOR_RGB2HSV)
+            for lower, upper in ranges:
+                mask |= cv2.inRange(
+                    pixels_hsv,
+                    np.array(lower, dtype=np.uint8),
+                    np.array(upper, dtype=np.uint8),
                 )
-            )
 
-        if not det_boxes:
+        # Bounding boxes and areas of all connected components in one pass
+        _, _, stats, centroids = cv2.connectedComponentsWithStats(
+            mask, connectivity=8, ltype=cv2.CV_32S
+        )
+        stats, centroids = stats[1:], centroids[1:]
+        area = stats[:, cv2.CC_STAT_AREA]
+        keep = area >= min_area
+        if max_area is not None:
+            keep &= area <= max_area
+        stats, centroids = stats[keep], centroids[keep]
+
+        if len(stats) == 0:
             raise ValueError(
-                f"No pixels with color {color} found in direction {towards}"
+                f"No pixels with color {color if color is not None else hsv} found in direction {towards}"
             )
 
-        return BoxArray([b.resolve(search_region) for b in det_boxes])
+        # Nearest first along the direction, from the center of this box
+        centers = centroids + (search_region.left, search_region.top)
+        distance = (centers - self.center.to_tuple()) @ direction_to_vector(towards)
+        order = np.argsort(distance, kind="stable")
+        return BoxArray.from_array(stats[order, :4]).resolve(search_region)
 
 
 type BoxSpec = Box | str
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+type Hook = Callable[[Span], None]
+
+# callbacks receiving every finished span, spans are not timed while empty
+_hooks: list[Hook] = []
+_hooks_lock = threading.Lock()
+
+
+@dataclass(slots=True)
+class Span:
+    """A timed operation, such as a capture, a template match or a click."""
+
+    name: str
+    # element names, regions and other details of the operation
+    attrs: dict[str, Any] = field(default_factory=dict)
+    # `time.perf_counter` readings
+    start: float = 0.0
+    end: float = 0.0
+    thread: int = 0
+
+    @property
+    def duration(self) -> float:
+        """Seconds the operation took."""
+        return self.end - self.start
+
+
+def add_hook(hook: Hook) -> None:
+    """Call `hook` with every span as it finishes, from the thread that ran it."""
+    with _hooks_lock:
+        _hooks.append(hook)
+
+
+def remove_hook(hook: Hook) -> None:
+    """Stop calling a hook added with `add_hook`."""
+    with _hooks_lock:
+        _hooks.remove(hook)
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Span | None]:
+    """Time the block as a span handed to the hooks.
+
+    Yields the span, so attributes known only inside the block can be added,
+    or None when no hook is installed and nothing is timed.
+    """
+    if not _hooks:
+        yield None
+        return
+    current = Span(name, attrs, time.perf_counter(), thread=threading.get_ident())
+    try:
+        yield current
+    except BaseException as e:
+        current.attrs["error"] = type(e).__name__
+        raise
+    finally:
+        current.end = time.perf_counter()
+        for hook in list(_hooks):
+            try:
+                hook(current)
+            except Exception as e:
+                logger.warning(f"Telemetry hook {hook!r} failed: {e}")
+
+
+def _jsonable(value: Any) -> Any:
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+class Recorder:
+    """Collects the spans finished while it is active.
+
+    ```python
+    with Recorder() as recorder:
+        workflow.expect(text("Dashboard"))
+    recorder.save_trace("expect.json")
+    ```
+    """
+
+    def __init__(self) -> None:
+        self.spans: list[Span] = []
+        self._lock = threading.Lock()
+
+    def __call__(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def __enter__(self) -> Recorder:
+        add_hook(self)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        remove_hook(self)
+
+    def summary(self) -> dict[str, tuple[int, float]]:
+        """Number of spans and total seconds, by span name."""
+        totals: dict[str, tuple[int, float]] = {}
+        for s in self.spans:
+            count, seconds = totals.get(s.name, (0, 0.0))
+            totals[s.name] = (count + 1, seconds + s.duration)
+        return totals
+
+    def prometheus(self, metric: str = "pyautoguide_span_seconds") -> str:
+        """The totals in the Prometheus text exposition format."""
+        lines = [
+            f"# HELP {metric} Time spent in pyautoguide operations.",
+            f"# TYPE {metric} summary",
+        ]
+        for name, (count, seconds) in sorted(self.summary().items()):
+            lines.append(f'{metric}_count{{span="{name}"}} {count}')
+            lines.append(f'{metric}_sum{{span="{name}"}} {seconds:.6f}')
+        return "\n".join(lines) + "\n"
+
+    def chrome_trace(self) -> dict[str, Any]:
+        """The spans as a Chrome trace, for chrome://tracing or Perfetto."""
+        pid = os.getpid()
+        return {
+            "traceEvents": [
+                {
+                    "name": s.name,
+                    "cat": "pyautoguide",
+                    "ph": "X",
+                    "ts": s.start * 1e6,
+                    "dur": s.duration * 1e6,
+                    "pid": pid,
+                    "tid": s.thread,
+                    "args": {key: _jsonable(value) for key, value in s.attrs.items()},
+                }
+                for s in self.spans
+            ],
+            "displayTimeUnit": "ms",
+        }
+
+    def save_trace(self, path: str | Path) -> None:
+        """Write the Chrome trace as JSON."""
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(), f)
+
+    def save_prometheus(self, path: str | Path) -> None:
+        """Write the Prometheus text dump, e.g. for the node exporter textfile collector."""
+        Path(path).write_text(self.prometheus())
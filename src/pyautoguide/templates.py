@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from .telemetry import span
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class Template:
+    """A reference image decoded once and kept in memory, ready for matching."""
+
+    path: Path | None
+    mtime: float
+    rgb: np.ndarray
+    gray: np.ndarray
+    _variants: dict[tuple[bool, float, int], np.ndarray] = field(
+        default_factory=dict, repr=False
+    )
+
+    @classmethod
+    def load(cls, path: str | Path) -> Template:
+        """Decode an image file into RGB and grayscale arrays."""
+        path = Path(path)
+        if not path.exists():
+            raise FileNotFoundError(f"Image file {path} does not exist.")
+        mtime = path.stat().st_mtime
+        with span("decode", path=str(path)), Image.open(path) as img:
+            template = cls.from_image(img, path=path, mtime=mtime)
+        logger.debug(f"Loaded template {path} ({template.size[0]}x{template.size[1]})")
+        return template
+
+    @classmethod
+    def from_image(
+        cls, img: Image.Image, *, path: Path | None = None, mtime: float = 0.0
+    ) -> Template:
+        """Wrap an in-memory image."""
+        rgb = np.asarray(img.convert("RGB"))
+        gray = cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY)
+        return cls(path=path, mtime=mtime, rgb=rgb, gray=gray)
+
+    @property
+    def size(self) -> tuple[int, int]:
+        """Width and height of the template."""
+        return self.rgb.shape[1], self.rgb.shape[0]
+
+    def image(self) -> Image.Image:
+        """The template as a PIL image, for custom locators."""
+        return Image.fromarray(self.rgb)
+
+    def array(
+        self, *, gray: bool = True, scale: float = 1.0, level: int = 0
+    ) -> np.ndarray:
+        """The template resized by `scale` and then halved `level` times.
+
+        Every variant is built on first use and kept with the template.
+        """
+        key = (gray, scale, level)
+        variant = self._variants.get(key)
+        if variant is None:
+            if level > 0:
+                variant = cv2.pyrDown(
+                    self.array(gray=gray, scale=scale, level=level - 1)
+                )
+            elif scale != 1.0:
+                variant = cv2.resize(
+                    self.gray if gray else self.rgb,
+                    None,
+                    fx=scale,
+                    fy=scale,
+                    interpolation=cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR,
+                )
+            else:
+                variant = self.gray if gray else self.rgb
+            self._variants[key] = variant
+        return variant
+
+
+class TemplateStore:
+    """In-memory cache of decoded templates, keyed by path.
+
+    Templates are read from disk once; `refresh` reloads those whose file
+    changed since they were loaded.
+    """
+
+    def __init__(self) -> None:
+        self._templates: dict[Path, Template] = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, path: str | Path) -> bool:
+        return Path(path) in self._templates
+
+    def __len__(self) -> int:
+        return len(self._templates)
+
+    def get(self, path: str | Path) -> Template:
+        """Return the template for the path, loading it on first use."""
+        key = Path(path)
+        template = self._templates.get(key)
+        if template is None:
+            with self._lock:
+                template = self._templates.get(key)
+                if template is None:
+                    template = self._templates[key] = Template.load(key)
+        return template
+
+    def refresh(self, paths: list[Path] | None = None) -> list[Path]:
+        """Reload templates whose file changed on disk and drop deleted ones.
+
+        Returns the paths that were reloaded.
+        """
+        reloaded = []
+        with self._lock:
+            for path in list(self._templates if paths is None else paths):
+                template = self._templates.get(path)
+                try:
+                    mtime = os.stat(path).st_mtime
+                except FileNotFoundError:
+                    self._templates.pop(path, None)
+                    continue
+                if template is None or template.mtime != mtime:
+                    self._templates[path] = Template.load(path)
+                    reloaded.append(path)
+        if reloaded:
+            logger.info(f"Reloaded {len(reloaded)} changed template(s)")
+        return reloaded
+
+    def clear(self) -> None:
+        """Forget every loaded template."""
+        with self._lock:
+            self._templates.clear()
+
+
+templates = TemplateStore()
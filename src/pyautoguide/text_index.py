@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+from collections import Counter, defaultdict
+from collections.abc import Iterable
+
+from .shapes import Box
+
+# side of the square grid cells detections are bucketed into, in pixels
+GRID_CELL = 128
+# length of the character n-grams used to find candidate detections
+GRAM = 3
+
+
+def _grams(text: str) -> set[str]:
+    return {text[i : i + GRAM] for i in range(len(text) - GRAM + 1)}
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance between two strings, or `limit + 1` once above it."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    row = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        prev, row[0] = row[0], i
+        for j, cb in enumerate(b, 1):
+            prev, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, prev + (ca != cb))
+        if min(row) > limit:
+            return limit + 1
+    return row[-1]
+
+
+def substring_distance(query: str, text: str, limit: int) -> int:
+    """Smallest edit distance between the query and any substring of the text.
+
+    Returns `limit + 1` as soon as no substring can be within `limit`.
+    """
+    # Sellers' algorithm: a match may start anywhere in the text for free
+    column = list(range(len(query) + 1))
+    best = column[-1]
+    for ct in text:
+        prev, column[0] = column[0], 0
+        for i, cq in enumerate(query, 1):
+            prev, column[i] = (
+                column[i],
+                min(column[i] + 1, column[i - 1] + 1, prev + (cq != ct)),
+            )
+        best = min(best, column[-1])
+    return best if best <= limit else limit + 1
+
+
+def text_matches(
+    query: str,
+    text: str,
+    *,
+    case_sensitive: bool = False,
+    full_text: bool = False,
+    max_distance: int = 0,
+) -> bool:
+    """Whether the text contains the query, or equals it with `full_text`."""
+    if not case_sensitive:
+        query, text = query.lower(), text.lower()
+    if full_text:
+        return edit_distance(text.strip(), query.strip(), max_distance) <= max_distance
+    if max_distance == 0:
+        return query in text
+    return substring_distance(query, text, max_distance) <= max_distance
+
+
+class TextIndex:
+    """OCR detections of a whole frame, indexed for region and text queries.
+
+    Detections are bucketed on a grid by their center, so any region can be
+    answered without running OCR again. Their lower-cased text is indexed by
+    character trigrams and by whole stripped string, so many text queries,
+    including ones tolerating OCR errors, only inspect a few candidates.
+    """
+
+    def __init__(self, detections: Iterable[tuple[str, Box]]):
+        self.detections = tuple(detections)
+        self._grid: dict[tuple[int, int], list[int]] = defaultdict(list)
+        for i, (_, box) in enumerate(self.detections):
+            center = box.center
+            self._grid[center.x // GRID_CELL, center.y // GRID_CELL].append(i)
+        self._lower = [txt.lower() for txt, _ in self.detections]
+        self._grams: dict[str, list[int]] | None = None
+        self._full: dict[str, list[int]] | None = None
+
+    def __len__(self) -> int:
+        return len(self.detections)
+
+    def _ids_within(self, region: Box) -> list[int]:
+        ids = []
+        for x in range(
+            region.left // GRID_CELL, (region.left + region.width) // GRID_CELL + 1
+        ):
+            for y in range(
+                region.top // GRID_CELL, (region.top + region.height) // GRID_CELL + 1
+            ):
+                ids.extend(self._grid.get((x, y), ()))
+        return [i for i in ids if self.detections[i][1].center in region]
+
+    def within(self, region: Box | None = None) -> list[tuple[str, Box]]:
+        """Detections whose center lies inside the region, in OCR order."""
+        if region is None:
+            return list(self.detections)
+        return [self.detections[i] for i in sorted(self._ids_within(region))]
+
+    def _build_text_index(self) -> None:
+        grams: dict[str, list[int]] = defaultdict(list)
+        full: dict[str, list[int]] = defaultdict(list)
+        for i, txt in enumerate(self._lower):
+            for gram in _grams(txt):
+                grams[gram].append(i)
+            full[txt.strip()].append(i)
+        self._grams, self._full = dict(grams), dict(full)
+
+    def _candidates(self, query: str, full_text: bool, max_distance: int) -> set[int]:
+        """Detections that may match, from the lower-cased indexes."""
+        if self._grams is None or self._full is None:
+            self._build_text_index()
+        assert self._grams is not None and self._full is not None
+        if full_text and max_distance == 0:
+            return set(self._full.get(query.strip(), ()))
+
+        grams = _grams(query)
+        # a match within k edits still shares all but k * GRAM of the query grams
+        needed = len(grams) - max_distance * GRAM
+        if needed <= 0:
+            return set(range(len(self.detections)))
+        postings = sorted((self._grams.get(gram, []) for gram in grams), key=len)
+        if max_distance == 0:
+            candidates = set(postings[0])
+            for posting in postings[1:]:
+                candidates.intersection_update(posting)
+            return candidates
+        counts = Counter(i for posting in postings for i in posting)
+        return {i for i, count in counts.items() if count >= needed}
+
+    def search(
+        self,
+        query: str,
+        *,
+        region: Box | None = None,
+        case_sensitive: bool = False,
+        full_text: bool = False,
+        max_distance: int = 0,
+    ) -> list[tuple[str, Box]]:
+        """Detections containing the query, or equal to it with `full_text`.
+
+        `max_distance` tolerates that many character edits, to absorb OCR
+        errors. Results are restricted to the region and kept in OCR order.
+        """
+        candidates = self._candidates(query.lower(), full_text, max_distance)
+        if region is not None:
+            candidates.intersection_update(self._ids_within(region))
+
+        # texts were lower-cased once when indexed
+        if not case_sensitive:
+            query = query.lower()
+        return [
+            self.detections[i]
+            for i in sorted(candidates)
+            if text_matches(
+                query,
+                self.detections[i][0] if case_sensitive else self._lower[i],
+                case_sensitive=True,
+                full_text=full_text,
+                max_distance=max_distance,
+            )
+        ]
@@ -2,52 +2,24 @@ from __future__ import annotations
 
 import logging
 from keyword import iskeyword
-from pathlib import Path
-from typing import TYPE_CHECKING, Literal
+from typing import TYPE_CHECKING
 
-import networkx as nx
 import numpy as np
-import pydot
-from transitions.extensions import GraphMachine
 
 if TYPE_CHECKING:
-    from .shapes import Box, Point
+    from .shapes import Box
 
 from ._types import Direction
 
 logger = logging.getLogger(__name__)
 
+IMAGE_FILE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
 
 def is_valid_variable_name(name: str) -> bool:
     return name.isidentifier() and not iskeyword(name)
 
 
-def get_file(
-    dir: Path, *, name: str, file_type: Literal["image", "text"] = "image"
-) -> Path:
-    """Find a file in the given directory."""
-    image_file_extensions = [".png", ".jpg", ".jpeg", ".bmp"]
-    text_file_extensions = [".txt", ".md", ".json"]
-
-    if file_type == "image":
-        valid_extensions = image_file_extensions
-    elif file_type == "text":
-        valid_extensions = text_file_extensions
-    else:
-        raise ValueError(f"Unknown file type: {file_type}")
-
-    for path in dir.glob(f"{name}.*"):
-        if path.suffix in valid_extensions:
-            return path
-    raise FileNotFoundError(f"File {name} not found in directory {dir}")
-
-
-def get_nx_graph(machine: GraphMachine) -> nx.MultiDiGraph:
-    pydot_graph = pydot.graph_from_dot_data(machine.get_graph().source)[0]  # type: ignore
-    nx_graph = nx.nx_pydot.from_pydot(pydot_graph)
-    return nx_graph
-
-
 def direction_to_vector(direction: Direction) -> np.ndarray:
     mapping = {
         "right": 0,
@@ -64,34 +36,6 @@ def direction_to_vector(direction: Direction) -> np.ndarray:
     return np.array([np.cos(rad), -np.sin(rad)])
 
 
-def line_intersects_box(
-    box: Box, direction: Direction, point: Point
-) -> tuple[Point, ...]:
-    """Check if a box intersects with a line in a specific direction."""
-    d = direction_to_vector(direction)
-    sides = [
-        ((box.left, box.top), (0, -1), box.height),  # left side
-        ((box.left, box.top + box.height), (1, 0), box.width),  # bottom side
-        (
-            (box.left + box.width, box.top + box.height),
-            (0, 1),
-            box.height,
-        ),  # right side
-        ((box.left + box.width, box.top), (-1, 0), box.width),  # top side
-    ]
-    intersections = ()
-    for corner, line_dir, length in sides:
-        line_start = np.array(corner)
-        line_dir_ = np.array(line_dir)
-        try:
-            t, u = np.linalg.solve(np.array([line_dir_, -d]).T, point - line_start)
-        except np.linalg.LinAlgError:
-            continue
-        if 0 <= t <= length and u >= 0:
-            intersections += (point + (u * d),)
-    return intersections
-
-
 def get_search_region_in_direction(
     box: Box, towards: Direction, size: tuple[int, int]
 ) -> Box:
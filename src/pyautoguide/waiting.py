@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import logging
+import math
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass
+from random import random
+from typing import TYPE_CHECKING
+
+from .frame import Frame, dirty_tiles, snapshot, tracker
+from .planner import NavigationError
+from .references import ReferenceElement
+from .shapes import Box
+
+if TYPE_CHECKING:
+    from .scene import Scene
+
+logger = logging.getLogger(__name__)
+
+# first and shortest pause between two screen checks, in seconds
+MIN_POLL_INTERVAL = 0.05
+# growth of the pause while the watched regions do not change
+POLL_BACKOFF = 2.0
+
+type WaitTarget = ReferenceElement | Scene
+
+
+@dataclass(frozen=True, slots=True)
+class WaitResult:
+    """Outcome of a wait."""
+
+    # the target that appeared
+    target: WaitTarget
+    # screens captured, and how many of them were searched for the targets
+    polls: int
+    evaluations: int
+    elapsed: float
+
+
+def _is_visible(target: WaitTarget) -> bool:
+    if isinstance(target, ReferenceElement):
+        return target.is_visible()
+    if hasattr(target, "is_on_screen"):
+        return target.is_on_screen()
+    raise TypeError("Target must be a Scene or ReferenceElement.")
+
+
+def _regions(target: WaitTarget) -> list:
+    if isinstance(target, ReferenceElement):
+        return [getattr(target, "region", None)]
+    return [region for elem in target.elements for region in _regions(elem)]
+
+
+class Waiter:
+    """Waits for any of the targets to appear on screen.
+
+    The screen is captured on every poll, but the targets are searched only
+    when something changed in the regions they are looked for in. The pause
+    between polls starts short and doubles, up to `interval`, while nothing
+    changes. Targets and `raise_if` are checked against the same capture.
+    """
+
+    def __init__(
+        self,
+        targets: Sequence[WaitTarget],
+        *,
+        raise_if: WaitTarget | None = None,
+        timeout: float | None = 60,
+        interval: float = 1,
+        keep_busy: bool = False,
+    ):
+        self.targets = list(targets)
+        self.raise_if = raise_if
+        self.timeout = timeout
+        self.interval = interval
+        self.keep_busy = keep_busy
+        watched = [*self.targets, *([raise_if] if raise_if is not None else [])]
+        self.regions = [region for target in watched for region in _regions(target)]
+
+    def _changed(self, frame: Frame, evaluated: Frame | None) -> bool:
+        """Whether a watched region changed since the last evaluated frame."""
+        if evaluated is None or evaluated.pixels.shape != frame.pixels.shape:
+            return True
+        if frame.previous is not evaluated:
+            # other captures came in between, compare with the evaluated one
+            frame = Frame(
+                frame.pixels, dirty=dirty_tiles(evaluated.pixels, frame.pixels)
+            )
+        return not all(
+            frame.is_clean(Box.from_spec(region, shape=frame.shape) if region else None)
+            for region in self.regions
+        )
+
+    def start(self) -> None:
+        """Start the clock, before the first `poll`."""
+        self._start = time.monotonic()
+        self._deadline = (
+            self._start + self.timeout if self.timeout is not None else math.inf
+        )
+        self._delay = MIN_POLL_INTERVAL
+        self._polls = self._evaluations = 0
+        self._evaluated: Frame | None = None
+
+    def poll(self) -> WaitResult | None:
+        """Capture the screen once and check the targets if it changed.
+
+        Returns the result once a target is visible. Raises NavigationError
+        when `raise_if` shows up, even together with a target.
+        """
+        with snapshot(tracker.grab()) as frame:
+            self._polls += 1
+            if not self._changed(frame, self._evaluated):
+                self._delay = min(self._delay * POLL_BACKOFF, self.interval)
+                self._evaluated = frame
+                return None
+            self._evaluations += 1
+            self._delay = MIN_POLL_INTERVAL
+            self._evaluated = frame
+            if self.raise_if is not None and _is_visible(self.raise_if):
+                raise NavigationError(f"Raise error condition met: {self.raise_if}")
+            for target in self.targets:
+                if _is_visible(target):
+                    result = WaitResult(
+                        target,
+                        self._polls,
+                        self._evaluations,
+                        time.monotonic() - self._start,
+                    )
+                    logger.debug(f"Waited for {target}: {result}")
+                    return result
+        return None
+
+    def pause(self) -> float:
+        """Seconds to sleep before the next `poll`.
+
+        Raises NavigationError once the deadline has passed.
+        """
+        now = time.monotonic()
+        if now >= self._deadline:
+            raise NavigationError(
+                f"Timeout waiting for {self.targets} after {self._evaluations} evaluations"
+            )
+        return min(self._delay, self._deadline - now)
+
+    def wait(self) -> WaitResult:
+        """Block until a target is visible.
+
+        Raises NavigationError when `raise_if` shows up first or when the
+        timeout expires.
+        """
+        self.start()
+        while (result := self.poll()) is None:
+            delay = self.pause()
+            if self.keep_busy:
+                self.move_mouse()
+            time.sleep(delay)
+        return result
+
+    def move_mouse(self) -> None:
+        import pyautogui as gui
+
+        w, h = gui.size()
+        gui.moveTo(
+            w * random(),
+            h * random(),
+            duration=2 * self.interval * random(),
+            tween=gui.easeInOutQuad,  # type: ignore
+        )
+
+
+def wait_for(
+    targets: WaitTarget | Sequence[WaitTarget],
+    *,
+    raise_if: WaitTarget | None = None,
+    timeout: float | None = 60,
+    interval: float = 1,
+    keep_busy: bool = False,
+) -> WaitResult:
+    """Wait until any of the targets is on screen, see `Waiter`."""
+    if not isinstance(targets, Sequence):
+        targets = [targets]
+    return Waiter(
+        targets,
+        raise_if=raise_if,
+        timeout=timeout,
+        interval=interval,
+        keep_busy=keep_busy,
+    ).wait()
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, wait
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from .references import ImageElement, ReferenceElement, ReferenceImageDir
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class WarmupReport:
+    """Seconds spent in each warm-up stage, and the errors of failed stages."""
+
+    timings: dict[str, float] = field(default_factory=dict)
+    errors: dict[str, str] = field(default_factory=dict)
+
+    @property
+    def total(self) -> float:
+        """Seconds spent in every stage."""
+        return sum(self.timings.values())
+
+    def __str__(self) -> str:
+        stages = ", ".join(f"{name} {secs:.3f}s" for name, secs in self.timings.items())
+        return f"Warm-up took {self.total:.3f}s ({stages})"
+
+
+@contextmanager
+def _stage(report: WarmupReport, name: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        report.errors[name] = repr(e)
+        logger.warning(f"Warm-up stage {name} failed: {e}")
+    finally:
+        report.timings[name] = time.perf_counter() - start
+
+
+def _sample_text(text: str) -> Image.Image:
+    img = Image.new("L", (320, 64), 255)
+    ImageDraw.Draw(img).text(
+        (12, 12), text, fill=0, font=ImageFont.load_default(size=32)
+    )
+    return img
+
+
+def _warm_ocr(report: WarmupReport) -> None:
+    with _stage(report, "ocr_import"):
+        from .constants import OCR_WORKERS
+        from .ocr import OCR
+    if "ocr_import" in report.errors:
+        return
+
+    if OCR_WORKERS:
+        from .ocr_service import get_service
+
+        with _stage(report, "ocr_engine"):
+            service = get_service()
+        with _stage(report, "ocr_inference"):
+            # one distinct image per worker, so every engine runs once
+            wait([
+                service.submit(_sample_text(f"PyAutoGuide {i}"))
+                for i in range(service.workers)
+            ])
+    else:
+        with _stage(report, "ocr_engine"):
+            engine = OCR()._engine()
+        with _stage(report, "ocr_inference"):
+            engine(np.asarray(_sample_text("PyAutoGuide")))
+
+
+def _warm_references(
+    references: Iterable[ReferenceElement | ReferenceImageDir],
+) -> None:
+    from .matching import _usable_level
+    from .templates import templates
+
+    for reference in references:
+        if isinstance(reference, ReferenceImageDir):
+            reference.preload()
+            elements = list(reference.images.values())
+        else:
+            elements = [reference]
+        for element in elements:
+            if not isinstance(element, ImageElement):
+                continue
+            for path in element.paths:
+                template = templates.get(path)
+                for scale in element.scales:
+                    needle = template.array(scale=scale)
+                    template.array(
+                        scale=scale, level=_usable_level(needle, element.pyramid)
+                    )
+
+
+def warmup(
+    references: Iterable[ReferenceElement | ReferenceImageDir] = (),
+    *,
+    ocr: bool = True,
+    background: bool = True,
+) -> Future[WarmupReport]:
+    """Pay the one-off start-up costs before the first locate call.
+
+    Imports and builds the OCR engine and runs it once on a sample image, then
+    decodes the given references with every scale and pyramid level they use.
+    By default this happens in a background thread; the returned future
+    holds a report of how long each stage took.
+    """
+    future: Future[WarmupReport] = Future()
+    references = list(references)
+
+    def run() -> None:
+        report = WarmupReport()
+        if ocr:
+            _warm_ocr(report)
+        with _stage(report, "references"):
+            _warm_references(references)
+        logger.info(str(report))
+        future.set_result(report)
+
+    if background:
+        threading.Thread(target=run, name="pyautoguide-warmup", daemon=True).start()
+    else:
+        run()
+    return future
@@ -1,38 +1,61 @@
+from __future__ import annotations
+
 import logging
 import time
-from random import random
-from typing import Callable
-
-import networkx as nx
-import pyautogui as gui
-from transitions.extensions import GraphMachine
-
-from .references import ReferenceElement
-from .utils import get_nx_graph
+from collections import deque
+from concurrent.futures import Future
+from contextlib import AbstractContextManager
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable
+
+from .constants import NAVIGATION_STATS_DIR
+from .frame import Frame, snapshot
+from .planner import NavigationError as NavigationError
+from .planner import NavigationGraph
+from .references import ReferenceElement, TextElement, locate_many
+from .telemetry import span
+from .waiting import WaitResult, wait_for
+from .warmup import WarmupReport, warmup
+
+if TYPE_CHECKING:
+    import graphviz
 
 logger = logging.getLogger(__name__)
 
+# states remembered as recently seen, probed before a full scan
+RECENT_STATES = 8
 
-class NavigationError(Exception):
-    """Custom exception for navigation errors."""
 
-    pass
+class WorkFlow:
+    """Manages transitions and actions without explicit scenes.
 
+    How long each navigation takes and how often it fails is measured, so
+    `expect` takes the fastest route. With `stats_path`, or when
+    `PYAUTOGUIDE_NAVIGATION_STATS_DIR` is set, the measurements are kept
+    across runs.
+    """
 
-class WorkFlow:
-    """Manages transitions and actions without explicit scenes."""
+    def __init__(self, name: str, stats_path: str | Path | None = None):
+        from transitions import Machine
 
-    def __init__(self, name: str):
         self.name = name
         self.elements: dict[str, ReferenceElement] = {}
         self.navigations: dict[str, Callable] = {}
         self.actions: dict[str, Callable] = {}
-        self._sm = GraphMachine()
+        self.graph = NavigationGraph()
+        self._recent: deque[str] = deque(maxlen=RECENT_STATES)
+        self._sm = Machine()
+        if stats_path is None and NAVIGATION_STATS_DIR:
+            stats_path = Path(NAVIGATION_STATS_DIR) / f"{name}.json"
+        self.stats_path = Path(stats_path) if stats_path else None
+        if self.stats_path is not None:
+            self.graph.load_stats(self.stats_path)
 
     def add_element(self, element: ReferenceElement):
         """Add a reference element to the workflow."""
         if element.name not in self.elements:
             self.elements[element.name] = element
+            self.graph.add_node(element.name)
             self._sm.add_state(element.name)
 
     def navigation(self, source: ReferenceElement, to: ReferenceElement):
@@ -43,6 +66,7 @@ class WorkFlow:
         def decorator[T: Callable](func: T) -> T:
             transition_name = "event_" + func.__name__
             self._sm.add_transition(transition_name, source.name, to.name, prepare=func)
+            self.graph.add_edge(source.name, to.name, transition_name)
             self.navigations[transition_name] = func
             return func
 
@@ -66,47 +90,110 @@ class WorkFlow:
             return self.navigations[nname](**kwargs)
         raise ValueError(f"Action or navigation '{name}' not found.")
 
-    def get_visible_elements(self) -> list[ReferenceElement]:
-        """Return a list of currently visible elements in the workflow."""
-        return [
-            elem
-            for elem in self.elements.values()
-            if elem.locate(n=1, error="coerce") is not None
-        ]
+    def frame(self) -> AbstractContextManager[Frame]:
+        """Capture the screen once for every locate call inside the block."""
+        return snapshot()
 
-    def expect(self, elem: ReferenceElement, **kwargs):
-        """Navigate to a specific scene."""
-        if elem.locate(n=1, error="coerce") is not None:
-            return
+    def prepare(self, *, background: bool = True) -> Future[WarmupReport]:
+        """Warm up OCR, if any element needs it, and preload every element."""
+        return warmup(
+            self.elements.values(),
+            ocr=any(isinstance(elem, TextElement) for elem in self.elements.values()),
+            background=background,
+        )
 
-        graph = get_nx_graph(self._sm)
+    def diagram(self) -> graphviz.Digraph:
+        """Graphviz diagram of the navigations between elements."""
+        return self.graph.diagram(self.name)
 
-        visible_elements = self.get_visible_elements()
-        all_paths = []
+    def get_visible_elements(self) -> list[ReferenceElement]:
+        """Return a list of currently visible elements in the workflow."""
+        found = locate_many(self.elements.values(), presence=True)
+        return [elem for elem, locations in found.items() if locations]
+
+    def _seen(self, name: str) -> None:
+        if name in self._recent:
+            self._recent.remove(name)
+        self._recent.append(name)
+
+    def _likely_states(self) -> list[str]:
+        """Element names from the likeliest current state to the least likely.
+
+        The last known state comes first, then the states it leads to, then
+        the other recently seen states, most recent first.
+        """
+        if not self._recent:
+            return []
+        last = self._recent[-1]
+        return list(
+            dict.fromkeys([last, *self.graph.successors(last), *reversed(self._recent)])
+        )
+
+    def estimate_state(
+        self, target: ReferenceElement | None = None
+    ) -> list[ReferenceElement]:
+        """Visible elements to plan a route from.
+
+        The likeliest states are probed first, one at a time, and the first
+        one visible, with a route to the target if one is given, is enough.
+        Every element is probed only when none of them is.
+        """
+        with snapshot():
+            for name in self._likely_states():
+                if target is not None and (
+                    name == target.name or not self.graph.reaches(name, target.name)
+                ):
+                    continue
+                if self.elements[name].is_visible():
+                    self._seen(name)
+                    return [self.elements[name]]
+            visible_elements = self.get_visible_elements()
         for present_elem in visible_elements:
-            all_paths.extend(
-                nx.all_simple_paths(graph, source=present_elem.name, target=elem.name)
+            self._seen(present_elem.name)
+        return visible_elements
+
+    def expect(self, elem: ReferenceElement, **kwargs):
+        """Navigate to a specific scene.
+
+        The run is timed as an "expect" span, see `telemetry`.
+        """
+        with span("expect", target=elem.name):
+            with snapshot():
+                if elem.is_visible():
+                    self._seen(elem.name)
+                    return
+                visible_elements = self.estimate_state(elem)
+
+            route = self.graph.route(
+                (present_elem.name for present_elem in visible_elements), elem.name
             )
-        if len(all_paths) == 0:
-            raise NavigationError(f"No path found from present screen to {elem}")
-        elif len(all_paths) > 1:
-            raise NavigationError(f"Multiple paths found from present screen to {elem}")
-
-        path = all_paths[0]
-        events: list[str] = [
-            graph.get_edge_data(path[i], path[i + 1])[0]["label"]  # type: ignore
-            for i in range(len(path) - 1)
-        ]
-        logger.info(events)
-
-        old_state = self._sm.state
-        try:
-            self._sm.set_state(path[0])
-            for event in events:
-                self._sm.dispatch(event, **kwargs)
-        except Exception as e:
-            self._sm.set_state(old_state)
-            raise e
+            logger.info(f"{route.events} (expected {route.cost:.2f}s)")
+
+            old_state = self._sm.state
+            try:
+                self._sm.set_state(route.source)
+                for event in route.events:
+                    start = time.monotonic()
+                    try:
+                        with span("transition", event=event):
+                            self._sm.dispatch(event, **kwargs)
+                    except Exception:
+                        self.graph.record(event, time.monotonic() - start, failed=True)
+                        raise
+                    self.graph.record(event, time.monotonic() - start)
+                self._seen(elem.name)
+            except Exception as e:
+                self._sm.set_state(old_state)
+                raise e
+            finally:
+                if self.stats_path is not None:
+                    self.graph.save_stats(self.stats_path)
+
+    async def aexpect(self, elem: ReferenceElement, **kwargs):
+        """Async `expect`, run in a worker thread."""
+        from .aio import run_blocking
+
+        return await run_blocking(self.expect, elem, **kwargs)
 
     def wait_for(
         self,
@@ -115,35 +202,37 @@ class WorkFlow:
         raise_if: ReferenceElement | None = None,
         timeout: float = 60,
         interval: float = 1,
-        keep_busy: bool = True,
-    ):
-        """Wait until the target scene or reference element is on screen."""
-        found = False
-        while not found:
-            if isinstance(element, ReferenceElement):
-                found = element.locate(n=1, error="coerce") is not None
-            elif isinstance(element, list):
-                for elem in element:
-                    assert isinstance(elem, ReferenceElement), (
-                        "All elements in the list must be ReferenceElement instances."
-                    )
-                found = any(elem.locate(n=1) is not None for elem in element)
-            else:
-                raise TypeError("Target must be a ReferenceElement.")
-
-            if raise_if is not None:
-                if raise_if.locate(n=1, error="coerce") is not None:
-                    raise NavigationError(f"Raise error condition met: {raise_if}")
-            start_time = time.time()
-            if not found:
-                if time.time() - start_time > timeout:
-                    raise NavigationError(f"Timeout waiting for {element}")
-                w, h = gui.size()
-                if keep_busy:
-                    gui.moveTo(
-                        w * random(),
-                        h * random(),
-                        duration=2 * interval * random(),
-                        tween=gui.easeInOutQuad,  # type: ignore
-                    )
-                time.sleep(interval)
+        keep_busy: bool = False,
+    ) -> WaitResult:
+        """Wait until the target scene or reference element is on screen.
+
+        The screen is searched again only when the watched regions change,
+        see `Waiter`.
+        """
+        return wait_for(
+            element,
+            raise_if=raise_if,
+            timeout=timeout,
+            interval=interval,
+            keep_busy=keep_busy,
+        )
+
+    async def await_for(
+        self,
+        element: ReferenceElement | list[ReferenceElement],
+        *,
+        raise_if: ReferenceElement | None = None,
+        timeout: float = 60,
+        interval: float = 1,
+        keep_busy: bool = False,
+    ) -> WaitResult:
+        """Async `wait_for`, sleeping on the event loop between screen checks."""
+        from .aio import await_for
+
+        return await await_for(
+            element,
+            raise_if=raise_if,
+            timeout=timeout,
+            interval=interval,
+            keep_busy=keep_busy,
+        )